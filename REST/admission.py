@@ -0,0 +1,200 @@
+"""
+Contrôle d'admission de l'API : mieux vaut refuser vite que répondre trop tard
+- limite de débit par client (seau à jetons par clé d'API connue, à défaut par adresse IP) → 429
+- limite de requêtes traitées simultanément, avec une file d'attente bornée → 503
+- priorité aux lectures : elles passent avant les écritures en attente et, file pleine,
+  prennent la place de la dernière écriture arrivée
+- les GET servis depuis le cache des réponses ne prennent pas de place (quelques dizaines de µs)
+Les refus portent un en-tête Retry-After
+"""
+
+import math
+import threading
+import time
+from collections import OrderedDict, deque
+
+from flask import g, jsonify, request
+
+READ, WRITE = 0, 1
+SAFE_METHODS = ('GET', 'HEAD')
+
+# Clients suivis par le limiteur de débit (les moins récents sont oubliés au-delà)
+MAX_CLIENTS = 10000
+# Délai conseillé (s) après un refus pour surcharge
+OVERLOAD_RETRY_AFTER = 1
+
+
+class RateLimiter:
+    """Seau à jetons par client : `rate` requêtes par seconde, rafales jusqu'à `burst`"""
+
+    def __init__(self, rate, burst, max_clients=MAX_CLIENTS):
+        self.rate = rate
+        self.burst = burst
+        self.max_clients = max_clients
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+        self.rejected = 0
+
+    def take(self, client):
+        """Consomme un jeton - retourne 0 si la requête passe, sinon l'attente (s) avant le prochain jeton"""
+        now = time.monotonic()
+        with self._lock:
+            tokens, last = self._buckets.pop(client, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - last) * self.rate)
+            if tokens >= 1:
+                tokens -= 1
+                wait = 0.0
+            else:
+                wait = (1 - tokens) / self.rate
+                self.rejected += 1
+            self._buckets[client] = (tokens, now)
+            if len(self._buckets) > self.max_clients:
+                self._buckets.popitem(last=False)
+        return wait
+
+
+class _Waiter:
+    __slots__ = ('event', 'admitted')
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.admitted = None
+
+
+class ConcurrencyLimiter:
+    """
+    Au plus max_concurrent requêtes en cours ; au-delà, max_queue requêtes attendent
+    (queue_timeout secondes au plus) dans deux files : lectures puis écritures
+    Une place libérée est transmise directement au premier en attente
+    """
+
+    def __init__(self, max_concurrent, max_queue, queue_timeout):
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.active = 0
+        self._queues = (deque(), deque())
+        self._lock = threading.Lock()
+        self.rejected = {'queue_full': 0, 'queue_timeout': 0, 'shed': 0}
+
+    @property
+    def queued(self):
+        return len(self._queues[READ]) + len(self._queues[WRITE])
+
+    def acquire(self, priority):
+        """Obtient une place (True) ou refuse la requête (False : file pleine, attente trop longue)"""
+        with self._lock:
+            if self.active < self.max_concurrent:
+                self.active += 1
+                return True
+            if self.queued >= self.max_queue:
+                if priority == WRITE or not self._queues[WRITE]:
+                    self.rejected['queue_full'] += 1
+                    return False
+                # File pleine : une lecture évince l'écriture arrivée en dernier
+                shed = self._queues[WRITE].pop()
+                shed.admitted = False
+                shed.event.set()
+                self.rejected['shed'] += 1
+            waiter = _Waiter()
+            self._queues[priority].append(waiter)
+
+        waiter.event.wait(self.queue_timeout)
+        with self._lock:
+            if waiter.admitted is None:
+                self._queues[priority].remove(waiter)
+                self.rejected['queue_timeout'] += 1
+                return False
+            return waiter.admitted
+
+    def release(self):
+        with self._lock:
+            for queue in self._queues:
+                if queue:
+                    waiter = queue.popleft()
+                    waiter.admitted = True
+                    waiter.event.set()
+                    return
+            self.active -= 1
+
+
+def client_key(api_keys=frozenset()):
+    """
+    Clé d'API (X-API-Key) si elle fait partie des clés configurées, sinon adresse IP du client
+    Une clé inconnue n'ouvre pas de seau : sinon, une clé nouvelle à chaque requête ne serait
+    jamais limitée et évincerait les vrais clients du limiteur
+    """
+    api_key = request.headers.get('X-API-Key')
+    return f"key:{api_key}" if api_key and api_key in api_keys else f"ip:{request.remote_addr}"
+
+
+def _refusal(status, message, retry_after):
+    response = jsonify({"success": False, "error": message, "code": status})
+    response.status_code = status
+    response.headers['Retry-After'] = str(max(1, math.ceil(retry_after)))
+    return response
+
+
+class AdmissionControl:
+    def __init__(self, rate_limiter=None, limiter=None):
+        self.rate_limiter = rate_limiter
+        self.limiter = limiter
+
+    def expose(self):
+        """Compteurs au format d'exposition texte de Prometheus"""
+        lines = [
+            "# HELP http_admission_rejected_total Requêtes refusées par le contrôle d'admission",
+            "# TYPE http_admission_rejected_total counter",
+        ]
+        if self.rate_limiter is not None:
+            lines.append(f'http_admission_rejected_total{{reason="rate_limited"}} {self.rate_limiter.rejected}')
+        if self.limiter is not None:
+            lines += [f'http_admission_rejected_total{{reason="{reason}"}} {count}'
+                      for reason, count in self.limiter.rejected.items()]
+            lines += [
+                "# HELP http_admission_in_flight Requêtes en cours de traitement",
+                "# TYPE http_admission_in_flight gauge",
+                f"http_admission_in_flight {self.limiter.active}",
+                "# HELP http_admission_queued Requêtes en file d'attente",
+                "# TYPE http_admission_queued gauge",
+                f"http_admission_queued {self.limiter.queued}",
+            ]
+        return lines
+
+
+def init_admission(app, rate_limiter=None, limiter=None, is_cached=lambda: False,
+                   exempt=(), unqueued=(), api_keys=()):
+    """
+    Installe le contrôle d'admission sur une application Flask
+    api_keys : clés d'API reconnues, limitées chacune par leur propre seau (les autres
+    requêtes sont limitées par adresse IP)
+    is_cached() : la requête sera-t-elle servie depuis le cache (pas de place consommée) ?
+    exempt : endpoints jamais limités (supervision) ; unqueued : endpoints limités en débit
+    mais sans place (attentes longues, qui occuperaient une place sans travailler)
+    """
+    admission = AdmissionControl(rate_limiter, limiter)
+    api_keys = frozenset(api_keys)
+
+    @app.before_request
+    def admit():
+        if request.method == 'OPTIONS' or request.endpoint in exempt:
+            return None
+        if rate_limiter is not None:
+            wait = rate_limiter.take(client_key(api_keys))
+            if wait:
+                return _refusal(429, "Too Many Requests - rate limit exceeded", wait)
+        if limiter is None or request.endpoint in unqueued:
+            return None
+        safe = request.method in SAFE_METHODS
+        if safe and is_cached():
+            return None
+        if not limiter.acquire(READ if safe else WRITE):
+            return _refusal(503, "Service Unavailable - server overloaded", OVERLOAD_RETRY_AFTER)
+        g.admission_slot = True
+
+    @app.teardown_request
+    def release_slot(exception):
+        if g.pop('admission_slot', False):
+            limiter.release()
+
+    return admission
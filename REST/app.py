@@ -1,16 +1,44 @@
-from flask import Flask, request, jsonify, url_for, make_response
+from flask import Flask, Response, request, jsonify, url_for, make_response
 from flask_cors import CORS
+import base64
+import binascii
+import functools
 import hashlib
+import atexit
 import json
-import subprocess
 import os
 import sys
+import threading
+from collections import OrderedDict
+
+# Modules partagés avec le service GraphQL (json_provider, compression)
+COMMON_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'common')
+if COMMON_DIR not in sys.path:
+    sys.path.append(COMMON_DIR)
+
+from store import DestinationStore, DuplicateDestinationError, SORT_KEYS
+from compression import CompressedBodyCache, init_compression
+from response_cache import ResponseCache, SingleFlight, cache_key, collection_dependency, item_dependency
+from sensor_client import DEFAULT_TARGET, SensorCallError, SensorClient, SensorUnavailableError
+from grpc_supervisor import GrpcServerSupervisor
+from change_feed import ChangeFeed, ResyncRequired
+from json_provider import FastJSONProvider
+from metrics import init_metrics, timed
+from admission import ConcurrencyLimiter, RateLimiter, init_admission
 
 app = Flask(__name__)
 CORS(app)
+# Sérialisation JSON via orjson / ujson si disponibles (mêmes valeurs que la stdlib, format des flottants près)
+app.json = FastJSONProvider(app)
+# Histogrammes de latence (/metrics) et en-tête Server-Timing - installés avant la compression
+# pour que le temps mesuré l'inclue (REST_SERVER_TIMING=0 : pas d'en-tête)
+metrics = init_metrics(app, server_timing=os.environ.get('REST_SERVER_TIMING', '1') != '0')
+
+# Compression négociée (gzip, deflate, brotli si installé) ; corps compressés mis en cache par ETag
+compressed_bodies = init_compression(app, CompressedBodyCache())
 
-# Base de données en mémoire
-destinations = [
+# Destinations initiales (insérées au premier démarrage)
+SEED_DESTINATIONS = [
     {
         "id": 1,
         "name": "Paris",
@@ -34,47 +62,345 @@ destinations = [
     }
 ]
 
-next_id = 4
+# Backend de stockage : REST_STORAGE=memory (défaut, indexé en mémoire)
+# ou REST_STORAGE=sqlite (persistant, fichier REST_SQLITE_PATH)
+STORAGE_BACKEND = os.environ.get('REST_STORAGE', 'memory')
+SQLITE_PATH = os.environ.get('REST_SQLITE_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'destinations.db'))
+
+if STORAGE_BACKEND == 'sqlite':
+    from sqlite_store import SQLiteDestinationStore
+    store = SQLiteDestinationStore(SQLITE_PATH, SEED_DESTINATIONS)
+elif STORAGE_BACKEND == 'memory':
+    store = DestinationStore(SEED_DESTINATIONS)
+else:
+    raise ValueError(f"Unknown REST_STORAGE backend: {STORAGE_BACKEND!r} (expected 'memory' or 'sqlite')")
+
+UPDATABLE_FIELDS = ('name', 'country', 'price_per_day', 'activities')
+# Champs d'une destination, dans l'ordre canonique (projection ?fields=)
+DESTINATION_FIELDS = ('id', *UPDATABLE_FIELDS)
+
+# Pagination par curseur
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 1000
+
+# Réponses GET sérialisées, invalidées précisément par les écritures du store
+response_cache = ResponseCache(store)
+# Requêtes GET identiques simultanées : un seul calcul, résultat partagé
+single_flight = SingleFlight()
+
+# Contrôle d'admission (0 désactive la limite correspondante) :
+# - REST_RATE_LIMIT requêtes/s par client, rafales jusqu'à REST_RATE_BURST → 429
+#   client : clé d'API (X-API-Key) si elle figure dans REST_API_KEYS (liste séparée par des
+#   virgules), adresse IP sinon
+# - REST_MAX_CONCURRENT requêtes traitées à la fois, REST_MAX_QUEUE en attente pendant
+#   REST_QUEUE_TIMEOUT s au plus → 503 ; lectures prioritaires, GET en cache jamais en attente
+RATE_LIMIT = float(os.environ.get('REST_RATE_LIMIT', 100))
+RATE_BURST = int(os.environ.get('REST_RATE_BURST', 200))
+MAX_CONCURRENT = int(os.environ.get('REST_MAX_CONCURRENT', 32))
+MAX_QUEUE = int(os.environ.get('REST_MAX_QUEUE', 128))
+QUEUE_TIMEOUT = float(os.environ.get('REST_QUEUE_TIMEOUT', 2))
+API_KEYS = [key.strip() for key in os.environ.get('REST_API_KEYS', '').split(',') if key.strip()]
+
+admission = init_admission(
+    app,
+    rate_limiter=RateLimiter(RATE_LIMIT, RATE_BURST) if RATE_LIMIT else None,
+    limiter=ConcurrencyLimiter(MAX_CONCURRENT, MAX_QUEUE, QUEUE_TIMEOUT) if MAX_CONCURRENT else None,
+    is_cached=lambda: request_cache_key() in response_cache,
+    exempt=('get_metrics',),
+    # Attente longue du journal des modifications : limitée en débit, sans occuper de place
+    unqueued=('get_destination_changes',),
+    api_keys=API_KEYS
+)
+metrics.collectors.append(admission.expose)
+
+# Journal des modifications (GET /destinations/changes)
+change_feed = ChangeFeed(store)
+DEFAULT_CHANGES_LIMIT = 100
+MAX_CHANGES_LIMIT = 1000
+# Attente longue maximale (s)
+MAX_CHANGES_WAIT = 30
+
+# Opérations en masse (POST /destinations/bulk)
+MAX_BULK_OPERATIONS = 100000
+BULK_OPERATIONS = ('create', 'update', 'delete')
+
+# Export NDJSON : nombre de lignes lues dans l'index entre deux reprises du curseur
+EXPORT_CHUNK_SIZE = 500
+
+# Client gRPC du service de capteurs : canaux ouverts au premier appel puis réutilisés
+sensors = SensorClient(os.environ.get('GRPC_TARGET', DEFAULT_TARGET))
+MAX_SENSOR_BATCH = 500
+# Serveur gRPC lancé à la demande par l'API : un seul processus, arrêté avec l'API
+grpc_server = GrpcServerSupervisor(sensors)
+atexit.register(grpc_server.stop, wait=True)
+
+def validate_fields(data):
+    """
+    Vérifie le type des champs fournis (les index ordonnés exigent des clés comparables)
+    Retourne un message d'erreur ou None
+    """
+    for field in ('name', 'country'):
+        if field in data and (not isinstance(data[field], str) or not data[field].strip()):
+            return f"Invalid field: {field} (non-empty string expected)"
+    if 'price_per_day' in data:
+        price = data['price_per_day']
+        if isinstance(price, bool) or not isinstance(price, (int, float)) or price < 0:
+            return "Invalid field: price_per_day (non-negative number expected)"
+    if 'activities' in data:
+        activities = data['activities']
+        if not isinstance(activities, list) or not all(isinstance(a, str) for a in activities):
+            return "Invalid field: activities (list of strings expected)"
+    return None
+
+def bad_request(message):
+    """Réponse 400 Bad Request"""
+    return jsonify({
+        "success": False,
+        "error": message,
+        "code": 400
+    }), 400
 
 # HATEOAS - Niveau 3 de Richardson
 
-def generate_etag(data):
-    """Génère un ETag pour le cache HTTP (RFC 7232)"""
-    content = json.dumps(data, sort_keys=True)
-    return hashlib.md5(content.encode()).hexdigest()
+def resource_etag(id, version=None, variant=None):
+    """
+    ETag d'une destination (RFC 7232), dérivé de sa version en O(1)
+    Plus de json.dumps + MD5 sur la ressource à chaque requête
+    version : version lue en même temps que la destination (sinon, version courante)
+    variant distingue les représentations d'une même version (projection, liens)
+    """
+    if version is None:
+        version = store.version(id)
+    suffix = f"-{variant}" if variant else ""
+    return f'"{store.epoch}-{id}-{version}{suffix}"'
+
+def collection_etag(variant=None, revision=None):
+    """
+    ETag de la collection, dérivé de la révision globale du store
+    variant distingue les représentations d'une même révision (ex: style de liens)
+    revision : révision lue en même temps que les lignes (sinon, révision courante)
+    """
+    if revision is None:
+        revision = store.revision
+    suffix = f"-{variant}" if variant else ""
+    return f'"{store.epoch}-r{revision}{suffix}"'
+
+def page_etag(rows, versions, *state):
+    """
+    ETag d'une page : dérivé des couples (id, version) des lignes affichées
+    Reste valide tant que les lignes de cette page (et ses voisines) ne changent pas,
+    même si le reste de la collection est modifié - coût O(limit)
+    """
+    fingerprint = repr((state, [(d['id'], version) for d, version in zip(rows, versions)]))
+    return f'"{store.epoch}-p{hashlib.blake2b(fingerprint.encode(), digest_size=8).hexdigest()}"'
+
+def encode_cursor(sort, key, direction):
+    """Curseur opaque : position (clé de tri) et sens de parcours, en base64 url-safe"""
+    raw = json.dumps({"s": sort, "k": list(key), "d": direction}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+# Types des éléments de la clé de tri d'un curseur (valeur, id), par tri
+CURSOR_KEY_TYPES = {
+    'id': (int, int),
+    'name': (str, int),
+    'price_per_day': ((int, float), int),
+    'relevance': (int, int),
+}
 
-def add_hateoas_links(destination, include_collection=True):
+def _is_cursor_value(value, expected):
+    # bool est un int pour Python, mais jamais une clé de tri
+    return isinstance(value, expected) and not isinstance(value, bool)
+
+def decode_cursor(cursor, sort):
+    """
+    Décode un curseur ; lève ValueError s'il est invalide ou d'un autre tri
+    Les types de la clé sont vérifiés : une clé fabriquée ne doit pas atteindre bisect
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        payload = json.loads(raw)
+        key, direction = tuple(payload["k"]), payload["d"]
+    except (binascii.Error, ValueError, TypeError, KeyError):
+        raise ValueError("Invalid cursor")
+    if payload.get("s") != sort:
+        raise ValueError("Cursor does not match sort parameter")
+    if direction not in ('next', 'prev') or len(key) != 2:
+        raise ValueError("Invalid cursor")
+    if not all(_is_cursor_value(value, expected) for value, expected in zip(key, CURSOR_KEY_TYPES[sort])):
+        raise ValueError("Invalid cursor")
+    return key, direction
+
+def etag_matches(header, etag, strong=False):
+    """
+    Compare un en-tête If-Match / If-None-Match à un ETag
+    Gère la liste de valeurs, le joker * et le préfixe faible W/
+    (ignoré pour If-None-Match, refusé en comparaison forte pour If-Match)
+    """
+    if not header:
+        return False
+    if header.strip() == '*':
+        return True
+    for candidate in header.split(','):
+        candidate = candidate.strip()
+        if candidate.startswith('W/'):
+            if strong:
+                continue
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+def parse_fields(value):
+    """
+    Champs demandés par ?fields=name,price_per_day, remis dans l'ordre canonique
+    L'id est toujours inclus (identité de la ressource, liens HATEOAS)
+    Retourne None si tous les champs sont demandés ; lève ValueError si un champ est inconnu
+    """
+    if value is None:
+        return None
+    requested = {field.strip() for field in value.split(',') if field.strip()}
+    if not requested:
+        raise ValueError("Invalid fields: at least one field expected")
+    unknown = requested.difference(DESTINATION_FIELDS)
+    if unknown:
+        raise ValueError(f"Invalid fields: {', '.join(sorted(unknown))} (expected among {', '.join(DESTINATION_FIELDS)})")
+    fields = tuple(field for field in DESTINATION_FIELDS if field == 'id' or field in requested)
+    return None if len(fields) == len(DESTINATION_FIELDS) else fields
+
+def project(destination, fields):
+    """Ne garde que les champs demandés, avant tout ajout de liens ou sérialisation"""
+    if fields is None:
+        return destination
+    return {field: destination[field] for field in fields}
+
+def representation_variant(links_style, fields):
+    """Identifiant de représentation (style de liens, champs) utilisé dans les ETags"""
+    parts = [] if links_style == 'full' else [links_style]
+    if fields is not None:
+        parts.append('.'.join(fields))
+    return '-'.join(parts) or None
+
+# Gabarits de liens résolus une seule fois par (scheme, host, script_root) ; l'en-tête Host
+# vient du client : LRU de petite taille pour qu'une rafale d'hôtes inventés ne le fasse pas grossir
+LINK_TEMPLATES_MAX = 32
+_link_templates = OrderedDict()
+_link_templates_lock = threading.Lock()
+_ID_SENTINEL = 987654321987654321
+
+ITEM_LINKS = (
+    ("self", 'get_destination', "GET"),
+    ("update", 'update_destination', "PUT"),
+    ("partial_update", 'patch_destination', "PATCH"),
+    ("delete", 'delete_destination', "DELETE"),
+)
+
+LINK_STYLES = ('full', 'relative', 'compact', 'none')
+# Une destination seule n'a pas de gabarit compact
+ITEM_LINK_STYLES = ('full', 'relative', 'none')
+
+def link_templates(external=True):
+    """
+    Résout les URLs HATEOAS via url_for une seule fois par hôte/scheme
+    Chaque lien est stocké sous forme (préfixe, suffixe) autour de l'id :
+    il suffit ensuite de concaténer l'id, sans passer par le routage Werkzeug
+    """
+    key = (request.scheme, request.host, request.script_root, external)
+    with _link_templates_lock:
+        templates = _link_templates.get(key)
+        if templates is not None:
+            _link_templates.move_to_end(key)
+    if templates is None:
+        items = {}
+        for rel, endpoint, method in ITEM_LINKS:
+            prefix, _, suffix = url_for(endpoint, id=_ID_SENTINEL, _external=external).partition(str(_ID_SENTINEL))
+            items[rel] = (prefix, suffix, method)
+        templates = {
+            "items": items,
+            "collection": url_for('get_destinations', _external=external)
+        }
+        with _link_templates_lock:
+            _link_templates[key] = templates
+            while len(_link_templates) > LINK_TEMPLATES_MAX:
+                _link_templates.popitem(last=False)
+    return templates
+
+def add_hateoas_links(destination, include_collection=True, external=True):
     """
     Ajoute les liens HATEOAS (Hypermedia As The Engine Of Application State)
     Niveau 3 du modèle de maturité de Richardson
+    Les URLs sont estampillées à partir des gabarits en cache (aucun url_for par ligne)
     """
+    templates = link_templates(external)
+    id = str(destination['id'])
     links = {
-        "self": {
-            "href": url_for('get_destination', id=destination['id'], _external=True),
-            "method": "GET"
-        },
-        "update": {
-            "href": url_for('update_destination', id=destination['id'], _external=True),
-            "method": "PUT"
-        },
-        "partial_update": {
-            "href": url_for('patch_destination', id=destination['id'], _external=True),
-            "method": "PATCH"
-        },
-        "delete": {
-            "href": url_for('delete_destination', id=destination['id'], _external=True),
-            "method": "DELETE"
-        }
+        rel: {"href": prefix + id + suffix, "method": method}
+        for rel, (prefix, suffix, method) in templates["items"].items()
     }
     
     if include_collection:
         links["collection"] = {
-            "href": url_for('get_destinations', _external=True),
+            "href": templates["collection"],
             "method": "GET"
         }
     
     return {**destination, "_links": links}
 
+def compact_item_links(external=True):
+    """
+    Liens d'élément sous forme de gabarit unique (RFC 6570), placé au niveau
+    de la collection en mode links=compact au lieu d'être répété sur chaque ligne
+    """
+    prefix, suffix, _ = link_templates(external)["items"]["self"]
+    return {
+        "href": prefix + "{id}" + suffix,
+        "templated": True,
+        "methods": [method for _, _, method in ITEM_LINKS]
+    }
+
+def request_cache_key():
+    return cache_key(request.host_url, request.path, request.args)
+
+def cacheable_headers(response):
+    """En-têtes conservés avec un corps en cache (les autres sont recalculés à chaque réponse)"""
+    return {name: response.headers[name] for name in ('ETag', 'Cache-Control') if name in response.headers}
+
+def cached_response(entry):
+    """Réponse servie depuis le cache (304 si le client a déjà cette représentation)"""
+    if etag_matches(request.headers.get('If-None-Match'), entry.etag):
+        return '', 304
+    return Response(entry.body, 200, entry.headers, mimetype='application/json')
+
+def coalesce(view):
+    """
+    Décorateur de lecture : les requêtes identiques simultanées (même URL normalisée,
+    même If-None-Match, même révision du store) partagent un seul calcul de la vue
+    Chaque requête reçoit sa propre copie de la réponse (compression, CORS... restent par requête)
+    """
+    @functools.wraps(view)
+    def wrapper(**kwargs):
+        def compute():
+            response = make_response(view(**kwargs))
+            headers = [(name, value) for name, value in response.headers if name != 'Content-Length']
+            return response.status_code, response.get_data(), headers
+        
+        key = (request_cache_key(), request.headers.get('If-None-Match'), store.revision)
+        status, body, headers = single_flight.do(key, compute)
+        return Response(body, status, headers)
+    return wrapper
+
+def duplicate_response(existing):
+    """Réponse 409 Conflict pointant vers la ressource existante"""
+    return jsonify({
+        "success": False,
+        "error": "Destination already exists",
+        "code": 409,  # Conflict
+        "_links": {
+            "existing_resource": {
+                "href": url_for('get_destination', id=existing['id'], _external=True)
+            }
+        }
+    }), 409
+
 @app.route('/')
 def home():
     """
@@ -103,62 +429,299 @@ def home():
 
 # GET - Récupérer toutes les destinations
 @app.route('/destinations', methods=['GET'])
+@coalesce
 def get_destinations():
     """
     Récupère la liste des destinations avec liens HATEOAS
     Méthode sûre et idempotente
     """
-    country = request.args.get('country')
-    max_price = request.args.get('max_price', type=int)
+    # Filtre vide (?country=) : ignoré, comme l'absence du paramètre
+    country = request.args.get('country') or None
+    min_price = request.args.get('min_price', type=float)
+    max_price = request.args.get('max_price', type=float)
+    activity = request.args.get('activity') or None
+    q = request.args.get('q') or None
+    links_style = request.args.get('links', 'full')
+    # Avec q, les résultats sont classés par pertinence par défaut
+    sort = request.args.get('sort', 'relevance' if q else 'id')
+    limit = request.args.get('limit', type=int)
+    cursor = request.args.get('cursor')
     
-    results = destinations
+    sorts = (*SORT_KEYS, 'relevance') if q else tuple(SORT_KEYS)
+    if links_style not in LINK_STYLES:
+        return bad_request(f"Invalid links style: {links_style} (expected one of {', '.join(LINK_STYLES)})")
+    try:
+        fields = parse_fields(request.args.get('fields'))
+    except ValueError as e:
+        return bad_request(str(e))
+    if sort not in sorts:
+        return bad_request(f"Invalid sort: {sort} (expected one of {', '.join(sorts)})")
     
-    if country:
-        results = [d for d in results if d['country'].lower() == country.lower()]
+    # Pagination par curseur (keyset) si limit ou cursor est fourni
+    paginated = limit is not None or cursor is not None
+    after = before = None
+    if paginated:
+        limit = DEFAULT_PAGE_SIZE if limit is None else limit
+        if not 1 <= limit <= MAX_PAGE_SIZE:
+            return bad_request(f"Invalid limit: expected 1..{MAX_PAGE_SIZE}")
+        if cursor:
+            try:
+                key, direction = decode_cursor(cursor, sort)
+            except ValueError as e:
+                return bad_request(str(e))
+            if direction == 'next':
+                after = key
+            else:
+                before = key
     
-    if max_price:
-        results = [d for d in results if d['price_per_day'] <= max_price]
+    # Une représentation (ETag) par style de liens et par projection
+    variant = representation_variant(links_style, fields)
     
-    # Ajouter les liens HATEOAS à chaque ressource
-    results_with_links = [add_hateoas_links(d, include_collection=False) for d in results]
+    # Réponse déjà sérialisée pour ces paramètres (toujours valide : invalidée à chaque
+    # écriture d'une destination qui correspond aux filtres)
+    key = request_cache_key()
+    with timed('cache'):
+        cached = response_cache.get(key)
+    if cached is not None:
+        return cached_response(cached)
     
-    # ETag pour le cache
-    etag = generate_etag(results)
+    if not paginated:
+        # ETag pour le cache, calculé avant toute construction de la réponse
+        etag = collection_etag(variant)
+        
+        # Vérifier si le client a déjà la version en cache (If-None-Match)
+        if etag_matches(request.headers.get('If-None-Match'), etag):
+            return '', 304  # Not Modified - le client peut utiliser son cache
     
-    # Vérifier si le client a déjà la version en cache (If-None-Match)
-    if request.headers.get('If-None-Match') == etag:
-        return '', 304  # Not Modified - le client peut utiliser son cache
+    # Index ordonné (par pays si filtré), index des prix et index inversé :
+    # seules les lignes correspondant aux filtres sont parcourues
+    def read_page():
+        results, has_more = store.page(sort, country=country, after=after, before=before,
+                                       limit=limit if paginated else None,
+                                       min_price=min_price, max_price=max_price,
+                                       activity=activity, q=q)
+        # Versions lues sur le même état que les lignes (ETag de page cohérent)
+        versions = store.versions(d['id'] for d in results) if paginated else None
+        return results, has_more, versions, store.revision
     
-    response = make_response(jsonify({
-        "success": True,
-        "count": len(results),
-        "data": results_with_links,
-        "_links": {
-            "self": {
-                "href": url_for('get_destinations', country=country, max_price=max_price, _external=True)
-            },
-            "create": {
-                "href": url_for('create_destination', _external=True),
-                "method": "POST"
-            }
+    with timed('lookup'):
+        results, has_more, versions, revision = store.read(read_page)
+    
+    if not paginated:
+        etag = collection_etag(variant, revision)
+    else:
+        has_next = has_more if before is None else True
+        has_prev = has_more if before is not None else (after is not None and bool(results))
+        
+        # ETag par page : 304 avant de construire les liens et le corps
+        with timed('etag'):
+            etag = page_etag(results, versions, variant, has_prev, has_next)
+        if etag_matches(request.headers.get('If-None-Match'), etag):
+            return '', 304
+    
+    # Projection (fields=) puis liens HATEOAS sur chaque ressource (sauf modes compact et none)
+    external = links_style == 'full'
+    with timed('links'):
+        rows = results if fields is None else [project(d, fields) for d in results]
+        if links_style in ('compact', 'none'):
+            results_with_links = rows
+        else:
+            results_with_links = [add_hateoas_links(d, include_collection=False, external=external) for d in rows]
+    
+    query = {
+        "country": country,
+        "min_price": request.args.get('min_price') if min_price is not None else None,
+        "max_price": request.args.get('max_price') if max_price is not None else None,
+        "activity": activity,
+        "q": q,
+        "links": None if links_style == 'full' else links_style,
+        "fields": ','.join(fields) if fields is not None else None,
+        "sort": None if sort == ('relevance' if q else 'id') else sort,
+        "limit": limit if paginated else None
+    }
+    collection_links = {
+        "self": {
+            "href": url_for('get_destinations', cursor=cursor, _external=external, **query)
+        },
+        "create": {
+            "href": link_templates(external)["collection"],
+            "method": "POST"
         }
-    }), 200)
+    }
+    if links_style == 'compact':
+        collection_links["item"] = compact_item_links(external)
+    if paginated and results:
+        sort_key = store.sort_key(sort, q)
+        if has_next:
+            next_cursor = encode_cursor(sort, sort_key(results[-1]), 'next')
+            collection_links["next"] = {
+                "href": url_for('get_destinations', cursor=next_cursor, _external=external, **query),
+                "method": "GET"
+            }
+        if has_prev:
+            prev_cursor = encode_cursor(sort, sort_key(results[0]), 'prev')
+            collection_links["prev"] = {
+                "href": url_for('get_destinations', cursor=prev_cursor, _external=external, **query),
+                "method": "GET"
+            }
+    
+    with timed('serialise'):
+        response = make_response(jsonify({
+            "success": True,
+            "count": len(results),
+            "data": results_with_links,
+            "_links": collection_links
+        }), 200)
     
     # Headers HTTP avancés
     response.headers['ETag'] = etag
     response.headers['Cache-Control'] = 'max-age=300'  # Cache 5 minutes
     
+    response_cache.put(key, response.get_data(), cacheable_headers(response),
+                       collection_dependency(country, min_price, max_price, activity, q), revision)
+    return response
+
+# GET - Export en streaming (NDJSON)
+@app.route('/destinations/export', methods=['GET'])
+def export_destinations():
+    """
+    Exporte la collection au format NDJSON (une destination par ligne)
+    Le corps est produit par un générateur et envoyé en transfert chunked :
+    la mémoire utilisée est constante quelle que soit la taille de la collection
+    Filtres identiques à GET /destinations (country, min_price, max_price) + tri (sort)
+    """
+    accept = request.accept_mimetypes
+    if accept and not accept.best_match(['application/x-ndjson']):
+        return jsonify({
+            "success": False,
+            "error": "Not Acceptable - export only available as application/x-ndjson",
+            "code": 406
+        }), 406
+    
+    country = request.args.get('country') or None
+    min_price = request.args.get('min_price', type=float)
+    max_price = request.args.get('max_price', type=float)
+    sort = request.args.get('sort', 'id')
+    
+    if sort not in SORT_KEYS:
+        return bad_request(f"Invalid sort: {sort} (expected one of {', '.join(SORT_KEYS)})")
+    
+    sort_key = SORT_KEYS[sort]
+    
+    def generate():
+        # Parcours par blocs en reprenant après la dernière clé lue (keyset) :
+        # aucune liste complète n'est construite et les écritures concurrentes
+        # n'invalident pas l'itération
+        after = None
+        while True:
+            chunk, has_more = store.page(sort, country=country, after=after, limit=EXPORT_CHUNK_SIZE,
+                                         min_price=min_price, max_price=max_price)
+            # Un bloc HTTP par lot de lignes (mémoire bornée par EXPORT_CHUNK_SIZE)
+            if chunk:
+                yield "".join(app.json.dumps(destination) + "\n" for destination in chunk)
+            if not has_more:
+                return
+            after = sort_key(chunk[-1])
+    
+    response = Response(generate(), mimetype='application/x-ndjson')
+    response.headers['Link'] = f'<{url_for("get_destinations", _external=True)}>; rel="collection"'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+@app.route('/destinations/changes', methods=['GET'])
+def get_destination_changes():
+    """
+    Journal des modifications depuis une position : ?since=<seq>&limit=&wait=<secondes>
+    Sans since, renvoie seulement la position courante (à lire avant une resynchronisation complète)
+    Avec wait, une requête à jour attend la prochaine écriture (long-poll)
+    410 Gone : position trop ancienne (ou journal redémarré) - relire toute la collection
+    """
+    since = request.args.get('since', type=int)
+    limit = request.args.get('limit', DEFAULT_CHANGES_LIMIT, type=int)
+    wait = request.args.get('wait', 0, type=float)
+    epoch = request.args.get('epoch')
+    
+    if since is not None and since < 0:
+        return bad_request("Invalid since: expected a sequence number >= 0")
+    if not 1 <= limit <= MAX_CHANGES_LIMIT:
+        return bad_request(f"Invalid limit: expected 1..{MAX_CHANGES_LIMIT}")
+    if not 0 <= wait <= MAX_CHANGES_WAIT:
+        return bad_request(f"Invalid wait: expected 0..{MAX_CHANGES_WAIT} seconds")
+    
+    try:
+        if epoch is not None and epoch != change_feed.epoch:
+            raise ResyncRequired(change_feed.oldest, change_feed.sequence)
+        if since is None:
+            changes, has_more, since = [], False, change_feed.sequence
+        else:
+            changes, has_more = change_feed.since(since, limit, wait)
+    except ResyncRequired as e:
+        return jsonify({
+            "success": False,
+            "error": "Resync required - changes since this position are no longer available",
+            "code": 410,
+            "epoch": change_feed.epoch,
+            "oldest": e.oldest,
+            "latest": e.latest,
+            "_links": {
+                "changes": {"href": url_for('get_destination_changes', _external=True), "method": "GET"},
+                "collection": {"href": url_for('get_destinations', _external=True), "method": "GET"}
+            }
+        }), 410
+    
+    next_since = changes[-1]["seq"] if changes else since
+    data = []
+    for change in changes:
+        change = dict(change)
+        if change["op"] != 'delete':
+            change["_links"] = {"self": {"href": url_for('get_destination', id=change["id"], _external=True)}}
+        data.append(change)
+    
+    response = jsonify({
+        "success": True,
+        "count": len(data),
+        "epoch": change_feed.epoch,
+        "since": since,
+        "next": next_since,
+        "has_more": has_more,
+        "data": data,
+        "_links": {
+            "self": {"href": request.url},
+            "next": {"href": url_for('get_destination_changes', since=next_since, epoch=change_feed.epoch,
+                                     _external=True)},
+            "collection": {"href": url_for('get_destinations', _external=True)}
+        }
+    })
+    response.headers['Cache-Control'] = 'no-store'
     return response
 
 # GET - Récupérer une destination par ID 
 @app.route('/destinations/<int:id>', methods=['GET'])
+@coalesce
 def get_destination(id):
     """
     Récupère une destination spécifique avec liens HATEOAS
     Méthode sûre et idempotente
     Support du cache avec ETag
+    Paramètres : fields (projection) et links (full, relative, none)
     """
-    destination = next((d for d in destinations if d['id'] == id), None)
+    links_style = request.args.get('links', 'full')
+    if links_style not in ITEM_LINK_STYLES:
+        return bad_request(f"Invalid links style: {links_style} (expected one of {', '.join(ITEM_LINK_STYLES)})")
+    try:
+        fields = parse_fields(request.args.get('fields'))
+    except ValueError as e:
+        return bad_request(str(e))
+    
+    key = request_cache_key()
+    with timed('cache'):
+        cached = response_cache.get(key)
+    if cached is not None:
+        return cached_response(cached)
+    
+    # Destination et version lues sur le même état (ETag cohérent avec le corps)
+    with timed('lookup'):
+        destination, version, revision = store.read(lambda: (store.get(id), store.version(id), store.revision))
     
     if not destination:
         return jsonify({
@@ -172,24 +735,30 @@ def get_destination(id):
             }
         }), 404
     
-    # ETag pour le cache (concurrence optimiste)
-    etag = generate_etag(destination)
+    # ETag pour le cache (concurrence optimiste), propre à la projection demandée
+    with timed('etag'):
+        etag = resource_etag(id, version, representation_variant(links_style, fields))
     
-    # Support du cache HTTP 304
-    if request.headers.get('If-None-Match') == etag:
+    # Support du cache HTTP 304 (avant de construire les liens et le corps)
+    if etag_matches(request.headers.get('If-None-Match'), etag):
         return '', 304
     
-    # Ajouter les liens HATEOAS
-    destination_with_links = add_hateoas_links(destination)
+    # Projection puis liens HATEOAS
+    with timed('links'):
+        destination_with_links = project(destination, fields)
+        if links_style != 'none':
+            destination_with_links = add_hateoas_links(destination_with_links, external=links_style == 'full')
     
-    response = make_response(jsonify({
-        "success": True,
-        "data": destination_with_links
-    }), 200)
+    with timed('serialise'):
+        response = make_response(jsonify({
+            "success": True,
+            "data": destination_with_links
+        }), 200)
     
     response.headers['ETag'] = etag
     response.headers['Cache-Control'] = 'max-age=300'
     
+    response_cache.put(key, response.get_data(), cacheable_headers(response), item_dependency(id), revision)
     return response
 
 # POST - Créer une nouvelle destination (avec Location header)
@@ -200,8 +769,6 @@ def create_destination():
     Retourne 201 Created avec header Location
     Non-idempotente
     """
-    global next_id
-    
     data = request.get_json()
     
     # Validation
@@ -214,31 +781,17 @@ def create_destination():
                 "code": 400
             }), 400
     
-    # Vérifier si la destination existe déjà (éviter les doublons)
-    existing = next((d for d in destinations if d['name'].lower() == data['name'].lower() 
-                     and d['country'].lower() == data['country'].lower()), None)
-    if existing:
-        return jsonify({
-            "success": False,
-            "error": "Destination already exists",
-            "code": 409,  # Conflict
-            "_links": {
-                "existing_resource": {
-                    "href": url_for('get_destination', id=existing['id'], _external=True)
-                }
-            }
-        }), 409
-    
-    new_destination = {
-        "id": next_id,
-        "name": data['name'],
-        "country": data['country'],
-        "price_per_day": data['price_per_day'],
-        "activities": data.get('activities', [])
-    }
+    error = validate_fields(data)
+    if error:
+        return bad_request(error)
     
-    destinations.append(new_destination)
-    next_id += 1
+    # Index unique (name, country) : vérification des doublons en O(1)
+    try:
+        with store.batch():
+            new_destination = store.create(data)
+            new_etag = resource_etag(new_destination['id'])
+    except DuplicateDestinationError as e:
+        return duplicate_response(e.existing)
     
     # Ajouter les liens HATEOAS
     destination_with_links = add_hateoas_links(new_destination)
@@ -251,6 +804,7 @@ def create_destination():
     
     # Header Location - indique où trouver la ressource créée
     response.headers['Location'] = url_for('get_destination', id=new_destination['id'], _external=True)
+    response.headers['ETag'] = new_etag
     
     return response
 
@@ -262,42 +816,48 @@ def update_destination(id):
     Méthode IDEMPOTENTE : plusieurs appels identiques = même résultat
     Support de la concurrence optimiste avec If-Match (ETag)
     """
-    destination = next((d for d in destinations if d['id'] == id), None)
-    
-    if not destination:
-        return jsonify({
-            "success": False,
-            "error": "Destination not found",
-            "code": 404
-        }), 404
-    
-    # Concurrence optimiste : vérifier l'ETag (If-Match)
-    current_etag = generate_etag(destination)
-    if_match = request.headers.get('If-Match')
-    
-    if if_match and if_match != current_etag:
-        return jsonify({
-            "success": False,
-            "error": "Precondition Failed - Resource was modified",
-            "code": 412,
-            "message": "La ressource a été modifiée. Veuillez récupérer la dernière version.",
-            "_links": {
-                "latest": {
-                    "href": url_for('get_destination', id=id, _external=True)
-                }
-            }
-        }), 412  # Precondition Failed
-    
     data = request.get_json()
     
-    # Mise à jour complète (PUT remplace toute la ressource)
-    destination['name'] = data.get('name', destination['name'])
-    destination['country'] = data.get('country', destination['country'])
-    destination['price_per_day'] = data.get('price_per_day', destination['price_per_day'])
-    destination['activities'] = data.get('activities', destination['activities'])
-    
-    # Nouvel ETag après modification
-    new_etag = generate_etag(destination)
+    # Vérification de l'ETag et écriture sans qu'un autre écrivain s'intercale
+    with store.batch():
+        destination = store.get(id)
+        
+        if not destination:
+            return jsonify({
+                "success": False,
+                "error": "Destination not found",
+                "code": 404
+            }), 404
+        
+        # Concurrence optimiste : vérifier l'ETag (If-Match)
+        current_etag = resource_etag(id)
+        if_match = request.headers.get('If-Match')
+        
+        if if_match and not etag_matches(if_match, current_etag, strong=True):
+            return jsonify({
+                "success": False,
+                "error": "Precondition Failed - Resource was modified",
+                "code": 412,
+                "message": "La ressource a été modifiée. Veuillez récupérer la dernière version.",
+                "_links": {
+                    "latest": {
+                        "href": url_for('get_destination', id=id, _external=True)
+                    }
+                }
+            }), 412  # Precondition Failed
+        
+        error = validate_fields(data)
+        if error:
+            return bad_request(error)
+        
+        # Mise à jour complète (PUT remplace toute la ressource)
+        try:
+            destination = store.update(id, {field: data[field] for field in UPDATABLE_FIELDS if field in data})
+        except DuplicateDestinationError as e:
+            return duplicate_response(e.existing)
+        
+        # Nouvel ETag après modification
+        new_etag = resource_etag(id)
     
     destination_with_links = add_hateoas_links(destination)
     
@@ -319,39 +879,40 @@ def patch_destination(id):
     Seuls les champs fournis sont modifiés
     Support de la concurrence optimiste avec If-Match
     """
-    destination = next((d for d in destinations if d['id'] == id), None)
-    
-    if not destination:
-        return jsonify({
-            "success": False,
-            "error": "Destination not found",
-            "code": 404
-        }), 404
-    
-    # Concurrence optimiste
-    current_etag = generate_etag(destination)
-    if_match = request.headers.get('If-Match')
-    
-    if if_match and if_match != current_etag:
-        return jsonify({
-            "success": False,
-            "error": "Precondition Failed",
-            "code": 412
-        }), 412
-    
     data = request.get_json()
     
-    # Mise à jour uniquement des champs fournis
-    if 'name' in data:
-        destination['name'] = data['name']
-    if 'country' in data:
-        destination['country'] = data['country']
-    if 'price_per_day' in data:
-        destination['price_per_day'] = data['price_per_day']
-    if 'activities' in data:
-        destination['activities'] = data['activities']
-    
-    new_etag = generate_etag(destination)
+    with store.batch():
+        destination = store.get(id)
+        
+        if not destination:
+            return jsonify({
+                "success": False,
+                "error": "Destination not found",
+                "code": 404
+            }), 404
+        
+        # Concurrence optimiste
+        current_etag = resource_etag(id)
+        if_match = request.headers.get('If-Match')
+        
+        if if_match and not etag_matches(if_match, current_etag, strong=True):
+            return jsonify({
+                "success": False,
+                "error": "Precondition Failed",
+                "code": 412
+            }), 412
+        
+        error = validate_fields(data)
+        if error:
+            return bad_request(error)
+        
+        # Mise à jour uniquement des champs fournis
+        try:
+            destination = store.update(id, {field: data[field] for field in UPDATABLE_FIELDS if field in data})
+        except DuplicateDestinationError as e:
+            return duplicate_response(e.existing)
+        
+        new_etag = resource_etag(id)
     destination_with_links = add_hateoas_links(destination)
     
     response = make_response(jsonify({
@@ -372,9 +933,8 @@ def delete_destination(id):
     Méthode IDEMPOTENTE : plusieurs DELETE sur la même ressource = même résultat
     Retourne 204 No Content si succès
     """
-    global destinations
-    
-    destination = next((d for d in destinations if d['id'] == id), None)
+    # Suppression en O(1) via l'index par id
+    destination = store.delete(id)
     
     if not destination:
         # IDEMPOTENCE : DELETE sur ressource inexistante retourne 404
@@ -390,8 +950,6 @@ def delete_destination(id):
             }
         }), 404
     
-    destinations = [d for d in destinations if d['id'] != id]
-    
     # 204 No Content - pas de corps de réponse
     response = make_response('', 204)
     
@@ -400,108 +958,320 @@ def delete_destination(id):
     
     return response
 
+# ═══════════════════════════════════════════════════ Opérations en masse ═══
+
+class BulkAbort(Exception):
+    """Interrompt une transaction atomique à la première opération en échec"""
+
+def apply_bulk_operation(operation, templates):
+    """
+    Applique une opération create / update / delete sur le store
+    Retourne le résultat de l'opération : statut HTTP, id, ETag et lien
+    (les liens sont estampillés depuis les gabarits en cache, sans url_for)
+    """
+    if not isinstance(operation, dict) or operation.get('op') not in BULK_OPERATIONS:
+        return {"status": 400, "error": f"Invalid operation (expected op in {', '.join(BULK_OPERATIONS)})"}
+    
+    op = operation['op']
+    data = operation.get('data') or {}
+    result = {"op": op}
+    
+    if not isinstance(data, dict):
+        return {**result, "status": 400, "error": "Invalid data (object expected)"}
+    
+    if op == 'create':
+        missing = next((field for field in ('name', 'country', 'price_per_day') if field not in data), None)
+        if missing:
+            return {**result, "status": 400, "error": f"Missing field: {missing}"}
+        error = validate_fields(data)
+        if error:
+            return {**result, "status": 400, "error": error}
+        try:
+            destination = store.create(data)
+        except DuplicateDestinationError as e:
+            return {**result, "status": 409, "error": "Destination already exists", "existing_id": e.existing['id']}
+        status = 201
+    else:
+        id = operation.get('id')
+        if isinstance(id, bool) or not isinstance(id, int) or store.get(id) is None:
+            return {**result, "id": id, "status": 404, "error": "Destination not found"}
+        
+        # Concurrence optimiste, comme If-Match sur PUT / PATCH / DELETE
+        if_match = operation.get('if_match')
+        if if_match and not etag_matches(if_match, resource_etag(id), strong=True):
+            return {**result, "id": id, "status": 412, "error": "Precondition Failed"}
+        
+        if op == 'delete':
+            store.delete(id)
+            return {**result, "id": id, "status": 204}
+        
+        error = validate_fields(data)
+        if error:
+            return {**result, "id": id, "status": 400, "error": error}
+        try:
+            destination = store.update(id, {field: data[field] for field in UPDATABLE_FIELDS if field in data})
+        except DuplicateDestinationError as e:
+            return {**result, "id": id, "status": 409, "error": "Destination already exists", "existing_id": e.existing['id']}
+        status = 200
+    
+    prefix, suffix, _ = templates["items"]["self"]
+    id = destination['id']
+    return {
+        **result,
+        "id": id,
+        "status": status,
+        "etag": resource_etag(id),
+        "href": prefix + str(id) + suffix
+    }
+
+@app.route('/destinations/bulk', methods=['POST'])
+def bulk_destinations():
+    """
+    Applique un lot d'opérations create / update / delete en une seule requête
+    Corps : {"operations": [...], "atomic": false} ou directement la liste d'opérations
+    (atomic passé alors en paramètre de requête : ?atomic=true)
+    - Mode par défaut : chaque opération réussit ou échoue indépendamment
+    - Mode atomique : tout-ou-rien, annulation complète à la première erreur
+    Retourne le statut HTTP et l'ETag de chaque opération
+    """
+    payload = request.get_json()
+    
+    if isinstance(payload, list):
+        operations = payload
+        atomic = request.args.get('atomic', 'false').lower() in ('1', 'true', 'yes')
+    elif isinstance(payload, dict):
+        operations = payload.get('operations')
+        atomic = payload.get('atomic', False)
+        # Seul le booléen JSON true active le mode atomique ("false" n'est pas faux)
+        if not isinstance(atomic, bool):
+            return bad_request("Invalid atomic flag: expected true or false")
+    else:
+        operations = None
+    
+    if not isinstance(operations, list):
+        return bad_request("Invalid body: expected a list of operations")
+    if len(operations) > MAX_BULK_OPERATIONS:
+        return bad_request(f"Too many operations: maximum {MAX_BULK_OPERATIONS} per request")
+    
+    templates = link_templates()
+    results = []
+    
+    def run():
+        for index, operation in enumerate(operations):
+            result = {"index": index, **apply_bulk_operation(operation, templates)}
+            results.append(result)
+            if atomic and result["status"] >= 400:
+                raise BulkAbort()
+    
+    if atomic:
+        try:
+            with store.transaction():
+                run()
+        except BulkAbort:
+            failed = results[-1]
+            # Les opérations déjà appliquées ont été annulées : ni ETag ni lien vers
+            # une ressource qui n'existe pas (ou plus dans cet état)
+            for index, result in enumerate(results[:-1]):
+                results[index] = {
+                    "index": result["index"],
+                    "op": result["op"],
+                    **({"id": result["id"]} if result["op"] != 'create' else {}),
+                    "status": 424,
+                    "error": "Failed Dependency - rolled back",
+                    "rolled_back": True
+                }
+            return jsonify({
+                "success": False,
+                "error": "Bulk operation rolled back",
+                "code": 409,
+                "atomic": True,
+                "failed_index": failed["index"],
+                "results": results
+            }), 409
+    else:
+        # Opérations indépendantes, mais une seule transaction côté stockage
+        with store.batch():
+            run()
+    
+    failed = sum(1 for result in results if result["status"] >= 400)
+    return jsonify({
+        "success": failed == 0,
+        "atomic": atomic,
+        "count": len(results),
+        "succeeded": len(results) - failed,
+        "failed": failed,
+        "results": results,
+        "_links": {
+            "collection": {
+                "href": templates["collection"],
+                "method": "GET"
+            }
+        }
+    }), 200
+
+# ═══════════════════════════════════════════════════════ Caches ═══
+
+@app.route('/cache/stats', methods=['GET'])
+def cache_stats():
+    """Compteurs des caches : réponses sérialisées, corps compressés et coalescence"""
+    return jsonify({
+        "response_cache": response_cache.stats(),
+        "compressed_bodies": compressed_bodies.stats(),
+        "coalescing": single_flight.stats(),
+        "_links": {
+            "self": {"href": url_for('cache_stats', _external=True)},
+            "destinations": {"href": url_for('get_destinations', _external=True), "method": "GET"}
+        }
+    })
+
+@app.route('/metrics', methods=['GET'])
+def get_metrics():
+    """Histogrammes de latence au format d'exposition texte de Prometheus"""
+    return Response(metrics.expose(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
 # ═══════════════════════════════════════════════════════ gRPC ═══
 
+def wait_requested(default):
+    """Paramètre ?wait=true|false des opérations sur le serveur gRPC"""
+    value = request.args.get('wait')
+    if value is None:
+        return default
+    return value.lower() in ('1', 'true', 'yes')
+
+def grpc_server_response(status, code=200):
+    return jsonify({
+        "success": status["error"] is None,
+        "data": status,
+        "_links": {
+            "self": {"href": url_for('grpc_server_status', _external=True)},
+            "start": {"href": url_for('run_grpc_server', _external=True), "method": "POST"},
+            "stop": {"href": url_for('stop_grpc_server', _external=True), "method": "POST"},
+            "restart": {"href": url_for('restart_grpc_server', _external=True), "method": "POST"}
+        }
+    }), code
+
 @app.route('/run-grpc-server', methods=['POST'])
 def run_grpc_server():
     """
-    Lance le serveur gRPC (grpc/server.py)
+    Lance le serveur gRPC (grpc/server.py) s'il ne tourne pas déjà
+    Répond dès que le serveur a servi un premier appel (?wait=false : sans attendre, 202)
     """
+    wait = wait_requested(True)
     try:
-        # Déterminer le répertoire du projet
-        base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-        grpc_server_path = os.path.join(base_dir, 'grpc', 'server.py')
-        
-        # Lancer le serveur en arrière-plan avec un timeout court pour capturer la sortie initiale
-        result = subprocess.run(
-            [sys.executable, grpc_server_path],
-            cwd=os.path.join(base_dir, 'grpc'),
-            capture_output=True,
-            text=True,
-            timeout=2
-        )
-        
-        output = result.stdout + result.stderr
-        
-        return jsonify({
-            "success": True,
-            "output": output if output else "Serveur gRPC en cours de démarrage sur le port 50051..."
-        }), 200
-    except subprocess.TimeoutExpired:
-        # Le timeout est attendu car le serveur reste actif
+        status = grpc_server.start(wait=wait)
+    except (SensorUnavailableError, OSError) as e:
+        return jsonify({"success": False, "error": str(e), "code": 503}), 503
+    
+    if status["state"] == 'ready':
+        origin = "déjà lancé hors de l'API" if status["external"] else f"PID {status['pid']}"
+        timing = f", prêt en {status['ready_in_ms']} ms" if status["ready_in_ms"] is not None else ""
+        output = "\n".join(status["output"]) or "Serveur gRPC lancé sur le port 50051"
         return jsonify({
             "success": True,
-            "output": "Serveur gRPC lancé avec succès sur le port 50051"
+            "output": f"{output}\n\n({origin}{timing})",
+            "data": status
         }), 200
-    except Exception as e:
-        return jsonify({
-            "success": False,
-            "error": str(e)
-        }), 500
+    if not wait and status["error"] is None:
+        return grpc_server_response(status, 202)
+    return jsonify({
+        "success": False,
+        "error": "\n".join([status["error"] or "gRPC server not ready", *status["output"]]),
+        "data": status,
+        "code": 503
+    }), 503
+
+@app.route('/grpc-server', methods=['GET'])
+def grpc_server_status():
+    """État du serveur gRPC supervisé (state, pid, disponibilité, dernières lignes de sortie)"""
+    return grpc_server_response(grpc_server.status())
+
+@app.route('/grpc-server/stop', methods=['POST'])
+def stop_grpc_server():
+    """Arrête le serveur gRPC lancé par l'API (202 : arrêt en cours)"""
+    wait = wait_requested(False)
+    status = grpc_server.stop(wait=wait)
+    return grpc_server_response(status, 202 if status["state"] == 'stopping' else 200)
+
+@app.route('/grpc-server/restart', methods=['POST'])
+def restart_grpc_server():
+    """Relance le serveur gRPC, en arrière-plan par défaut (202) - ?wait=true pour attendre"""
+    wait = wait_requested(False)
+    try:
+        status = grpc_server.restart(wait=wait)
+    except (SensorUnavailableError, OSError) as e:
+        return jsonify({"success": False, "error": str(e), "code": 503}), 503
+    return grpc_server_response(status, 200 if wait else 202)
+
+# Codes gRPC → codes HTTP renvoyés par la passerelle
+GRPC_HTTP_STATUS = {
+    'INVALID_ARGUMENT': 400,
+    'NOT_FOUND': 404,
+    'UNAVAILABLE': 503,
+    'DEADLINE_EXCEEDED': 504,
+}
+
+def sensor_error_response(error):
+    """Réponse d'erreur pour un appel gRPC échoué ou un client gRPC indisponible"""
+    if isinstance(error, SensorUnavailableError):
+        return jsonify({"success": False, "error": str(error), "code": 503}), 503
+    status = GRPC_HTTP_STATUS.get(error.code, 502)
+    return jsonify({
+        "success": False,
+        "error": error.details,
+        "grpc_code": error.code,
+        "code": status
+    }), status
 
 @app.route('/run-grpc-client', methods=['POST'])
 def run_grpc_client():
     """
-    Lance le client gRPC (grpc/client.py) avec un sensor_id optionnel
+    Lit un capteur via le client gRPC partagé, avec un sensor_id optionnel
+    Plus de sous-processus : le canal est ouvert une fois et réutilisé
     """
+    data = request.get_json(silent=True) or {}
+    sensor_id = data.get('sensor_id', 'SN-001')
+    if not isinstance(sensor_id, str) or not sensor_id:
+        return bad_request("Invalid sensor_id (non-empty string expected)")
+    
     try:
-        data = request.get_json() or {}
-        sensor_id = data.get('sensor_id', 'SN-001')
-        
-        # Déterminer le répertoire du projet
-        base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-        grpc_client_path = os.path.join(base_dir, 'grpc', 'client.py')
-        
-        # Créer un script temporaire qui appelle le client avec le sensor_id
-        client_code = f"""
-import grpc
-import sensor_pb2
-import sensor_pb2_grpc
-
-def run():
-    with grpc.insecure_channel('localhost:50051') as channel:
-        stub = sensor_pb2_grpc.SensorStub(channel)   
-        response = stub.GetTemperature(sensor_pb2.SensorRequest(sensor_id="{sensor_id}"))
-        
-    print(f"Capteur: {sensor_id}")
-    print(f"Température: {{response.temperature}}°{{response.unit}}")
-    print(f"\\nRéponse gRPC reçue avec succès!")
+        reading = sensors.get_temperature(sensor_id)
+    except (SensorUnavailableError, SensorCallError) as e:
+        return sensor_error_response(e)
+    
+    return jsonify({
+        "success": True,
+        "data": reading,
+        "output": (f"Capteur: {sensor_id}\n"
+                   f"Température: {reading['temperature']}°{reading['unit']}\n"
+                   f"\nRéponse gRPC reçue avec succès!\n")
+    }), 200
 
-if __name__ == '__main__':
-    run()
-"""
-        
-        # Lancer le client
-        result = subprocess.run(
-            [sys.executable, '-c', client_code],
-            cwd=os.path.join(base_dir, 'grpc'),
-            capture_output=True,
-            text=True,
-            timeout=5
-        )
-        
-        if result.returncode == 0:
-            output = result.stdout
-            return jsonify({
-                "success": True,
-                "output": output
-            }), 200
-        else:
-            error = result.stderr
-            return jsonify({
-                "success": False,
-                "error": error if error else "Erreur lors de l'exécution du client gRPC"
-            }), 500
-    except subprocess.TimeoutExpired:
-        return jsonify({
-            "success": False,
-            "error": "Timeout: le serveur gRPC n'a pas répondu. Assurez-vous qu'il est lancé."
-        }), 500
-    except Exception as e:
-        return jsonify({
-            "success": False,
-            "error": str(e)
-        }), 500
+@app.route('/run-grpc-client/batch', methods=['POST'])
+def run_grpc_client_batch():
+    """
+    Lit plusieurs capteurs en une requête : {"sensor_ids": ["SN-001", "SN-002", ...]}
+    Les appels gRPC partent en parallèle ; chaque capteur a sa lecture ou son erreur
+    """
+    data = request.get_json(silent=True) or {}
+    sensor_ids = data.get('sensor_ids')
+    if not isinstance(sensor_ids, list) or not sensor_ids \
+            or not all(isinstance(sensor_id, str) and sensor_id for sensor_id in sensor_ids):
+        return bad_request("Invalid sensor_ids (non-empty list of strings expected)")
+    if len(sensor_ids) > MAX_SENSOR_BATCH:
+        return bad_request(f"Too many sensor_ids: maximum {MAX_SENSOR_BATCH} per request")
+    
+    try:
+        readings = sensors.get_temperatures(sensor_ids)
+    except SensorUnavailableError as e:
+        return sensor_error_response(e)
+    
+    failed = sum(1 for reading in readings if "error" in reading)
+    return jsonify({
+        "success": failed == 0,
+        "count": len(readings),
+        "failed": failed,
+        "data": readings
+    }), 200
 
 if __name__ == '__main__':
     print("REST API started on http://localhost:5000")
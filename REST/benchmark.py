@@ -0,0 +1,214 @@
+"""
+Benchmarks du stockage REST
+Compare les parcours linéaires d'origine (list comprehensions) aux index du DestinationStore,
+puis les deux backends de stockage (mémoire / SQLite) et les backends de sérialisation JSON
+
+Usage : python benchmark.py [nombre_de_destinations]
+        python benchmark.py stockage [taille ...]    (défaut : 10000 100000 1000000)
+        python benchmark.py json [taille ...]        (défaut : 1 50 1000 10000)
+"""
+
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+from store import DestinationStore
+from sqlite_store import SQLiteDestinationStore
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'common'))
+from json_provider import BACKENDS
+
+COUNTRIES = ["France", "Japan", "USA", "Spain", "Italy", "Peru", "Kenya", "Canada",
+             "Brazil", "India", "Norway", "Chile", "Egypt", "Vietnam", "Mexico", "Greece"]
+
+
+def generate_destinations(count, seed=42):
+    """Génère un catalogue synthétique de destinations"""
+    rng = random.Random(seed)
+    return [
+        {
+            "id": i,
+            "name": f"City {i}",
+            "country": rng.choice(COUNTRIES),
+            "price_per_day": rng.randint(20, 500),
+            "activities": []
+        }
+        for i in range(1, count + 1)
+    ]
+
+
+def measure(function, repeat=20):
+    """Temps moyen d'un appel, en millisecondes"""
+    function()  # échauffement (fusion des index en attente)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        function()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def report(title, baseline, indexed):
+    print(f"  {title:<50} scan: {baseline:9.3f} ms   index: {indexed:9.3f} ms   x{baseline / indexed:,.1f}")
+
+
+def bench_price_filters(destinations, store):
+    """Filtres de prix : list comprehension vs index trié (bisect)"""
+    print("\nFiltres de prix (max_price / min_price / country)")
+    print("-" * 108)
+
+    report(
+        "max_price=50",
+        measure(lambda: [d for d in destinations if d['price_per_day'] <= 50]),
+        measure(lambda: store.page('price_per_day', max_price=50)),
+    )
+    report(
+        "min_price=100 & max_price=110",
+        measure(lambda: [d for d in destinations if 100 <= d['price_per_day'] <= 110]),
+        measure(lambda: store.page('price_per_day', min_price=100, max_price=110)),
+    )
+    report(
+        "country=France & max_price=150",
+        measure(lambda: [d for d in destinations
+                         if d['country'].lower() == 'france' and d['price_per_day'] <= 150]),
+        measure(lambda: store.page('price_per_day', country='France', max_price=150)),
+    )
+    report(
+        "country=France & max_price=150 (tri par id)",
+        measure(lambda: [d for d in destinations
+                         if d['country'].lower() == 'france' and d['price_per_day'] <= 150]),
+        measure(lambda: store.page('id', country='France', max_price=150)),
+    )
+    report(
+        "max_price=150, première page de 20 (tri par nom)",
+        measure(lambda: sorted((d for d in destinations if d['price_per_day'] <= 150),
+                               key=lambda d: d['name'].lower())[:20]),
+        measure(lambda: store.page('name', max_price=150, limit=20)),
+    )
+
+
+def bench_backends(sizes):
+    """Backend mémoire vs SQLite (WAL) : chargement, lectures ciblées et écritures"""
+    print("\nBackends de stockage (mémoire / SQLite)")
+    print("-" * 108)
+
+    for count in sizes:
+        destinations = generate_destinations(count)
+        with tempfile.TemporaryDirectory() as directory:
+            start = time.perf_counter()
+            memory = DestinationStore(destinations)
+            memory_load = (time.perf_counter() - start) * 1000
+            start = time.perf_counter()
+            sqlite = SQLiteDestinationStore(os.path.join(directory, 'bench.db'), destinations)
+            sqlite_load = (time.perf_counter() - start) * 1000
+
+            print(f"\n  {count:,} destinations")
+            print(f"  {'chargement initial':<50} mémoire: {memory_load:9.1f} ms   sqlite: {sqlite_load:9.1f} ms")
+            ids = [random.randint(1, count) for _ in range(100)]
+            cases = [
+                ("100 x get(id)", lambda store: [store.get(id) for id in ids]),
+                ("page de 20, tri par prix", lambda store: store.page('price_per_day', limit=20)),
+                ("page de 20, country=France & max_price=150",
+                 lambda store: store.page('price_per_day', country='France', max_price=150, limit=20)),
+                ("page de 20, tri par nom, après un curseur",
+                 lambda store: store.page('name', after=('city 5', 5), limit=20)),
+                ("min_price=100 & max_price=110 (tout)",
+                 lambda store: store.page('price_per_day', min_price=100, max_price=110)),
+            ]
+            for title, case in cases:
+                repeat = 5 if title.endswith("(tout)") else 20
+                print(f"  {title:<50} mémoire: {measure(lambda: case(memory), repeat):9.3f} ms"
+                      f"   sqlite: {measure(lambda: case(sqlite), repeat):9.3f} ms")
+
+            for name, store in (("mémoire", memory), ("sqlite", sqlite)):
+                start = time.perf_counter()
+                with store.batch():
+                    for i in range(1000):
+                        store.create({"name": f"Bench {i}", "country": "Peru", "price_per_day": i})
+                elapsed = (time.perf_counter() - start) * 1000
+                print(f"  {'1 000 créations groupées (batch) - ' + name:<50} {elapsed:9.1f} ms")
+
+
+def json_payload(count):
+    """Réponse de GET /destinations (liens HATEOAS complets, activités accentuées)"""
+    base = "http://localhost:5000/destinations"
+    rng = random.Random(7)
+    activities = ["Tour Eiffel", "Champs-Élysées", "Musée d'Orsay", "Temple Senso-ji", "Plongée", "Randonnée"]
+    data = []
+    for destination in generate_destinations(count):
+        destination["activities"] = rng.sample(activities, 3)
+        destination["price_per_day"] += 0.5
+        # Flottants dont l'écriture varie selon le backend (exposant, précision)
+        destination["rating"] = rng.choice([4.25, 0.1 + 0.2, 1.5e-7, 1e16, 123456789.123, 2.5e21])
+        destination["_links"] = {
+            "self": {"href": f"{base}/{destination['id']}"},
+            "collection": {"href": base},
+            "update": {"href": f"{base}/{destination['id']}", "method": "PUT"},
+            "partial_update": {"href": f"{base}/{destination['id']}", "method": "PATCH"},
+            "delete": {"href": f"{base}/{destination['id']}", "method": "DELETE"}
+        }
+        data.append(destination)
+    return {"success": True, "count": count, "data": data, "_links": {"self": {"href": base}}}
+
+
+def bench_json(sizes):
+    """
+    Sérialisation des réponses : json (stdlib) / ujson / orjson
+    Sortie relue et comparée à celle de la stdlib (mêmes valeurs), octets comparés pour information
+    """
+    print(f"\nSérialisation JSON (backends disponibles : {', '.join(BACKENDS)})")
+    print("-" * 108)
+    reference, _ = BACKENDS['json']
+
+    for count in sizes:
+        payload = json_payload(count)
+        repeat = max(5, 20000 // count)
+        baseline = None
+        print(f"\n  {count:,} destinations ({len(reference(payload)):,} octets)")
+        for name, (dumps, _) in BACKENDS.items():
+            outputs = [(dumps(payload, indent), reference(payload, indent)) for indent in (None, 2)]
+            same_values = all(json.loads(output) == json.loads(expected) for output, expected in outputs)
+            same_bytes = all(output == expected for output, expected in outputs)
+            elapsed = measure(lambda: dumps(payload), repeat)
+            baseline = baseline or elapsed
+            print(f"  {name:<10} {elapsed:9.3f} ms   x{baseline / elapsed:5.1f}"
+                  f"   {'mêmes valeurs' if same_values else 'VALEURS DIFFÉRENTES'}"
+                  f"{'' if same_bytes else ' (écriture des flottants différente)'}")
+
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == 'json':
+        sizes = [int(size) for size in sys.argv[2:]] or [1, 50, 1000, 10000]
+        print("=" * 108)
+        print("BENCHMARK DE LA SÉRIALISATION JSON")
+        print("=" * 108)
+        bench_json(sizes)
+        print()
+        return
+
+    if len(sys.argv) > 1 and sys.argv[1] == 'stockage':
+        sizes = [int(size) for size in sys.argv[2:]] or [10000, 100000, 1000000]
+        print("=" * 108)
+        print("BENCHMARK DES BACKENDS DE STOCKAGE REST")
+        print("=" * 108)
+        bench_backends(sizes)
+        print()
+        return
+
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    print("=" * 108)
+    print(f"BENCHMARK DU STOCKAGE REST - {count:,} destinations")
+    print("=" * 108)
+
+    destinations = generate_destinations(count)
+    start = time.perf_counter()
+    store = DestinationStore(destinations)
+    print(f"Construction des index : {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    bench_price_filters(destinations, store)
+    print()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+"""
+Journal des modifications (change feed) pour la synchronisation incrémentale
+- chaque écriture publiée par le store reçoit un numéro de séquence croissant
+- créations et mises à jour portent la destination complète, les suppressions une
+  pierre tombale (id seul)
+- rétention bornée : au-delà, un client trop en retard doit se resynchroniser
+- attente longue (long-poll) : un lecteur à jour attend la prochaine écriture
+"""
+
+import threading
+import time
+import uuid
+from collections import deque
+
+# Nombre de modifications conservées
+CHANGE_RETENTION = 10000
+
+
+class ResyncRequired(Exception):
+    """La position demandée est sortie de la rétention (ou vient d'un autre journal)"""
+
+    def __init__(self, oldest, latest):
+        super().__init__(f"changes before {oldest} are no longer retained")
+        self.oldest = oldest
+        self.latest = latest
+
+
+class ChangeFeed:
+    """
+    Journal en ajout seul, alimenté par store.on_change
+    Les séquences repartent de zéro à chaque démarrage : l'epoch du journal permet
+    au client de le détecter
+    """
+
+    def __init__(self, store, retention=CHANGE_RETENTION):
+        self.epoch = uuid.uuid4().hex[:8]
+        self.sequence = 0
+        self._changes = deque(maxlen=retention)
+        self._condition = threading.Condition()
+        store.on_change(self.record)
+
+    @property
+    def oldest(self):
+        """Plus petite position `since` encore servie sans resynchronisation"""
+        with self._condition:
+            return self._changes[0]["seq"] - 1 if self._changes else self.sequence
+
+    def record(self, changes):
+        """Listener du store : modifications (avant, après) d'une écriture publiée, dans l'ordre"""
+        with self._condition:
+            timestamp = time.time()
+            for before, after in changes:
+                self.sequence += 1
+                if after is None:
+                    change = {"seq": self.sequence, "op": "delete", "id": before["id"]}
+                else:
+                    change = {"seq": self.sequence, "op": "create" if before is None else "update",
+                              "id": after["id"], "data": after}
+                change["timestamp"] = timestamp
+                self._changes.append(change)
+            self._condition.notify_all()
+
+    def since(self, sequence, limit, wait=0):
+        """
+        Modifications postérieures à `sequence` (au plus limit), et s'il en reste d'autres
+        Sans modification, attend jusqu'à `wait` secondes la prochaine écriture
+        Lève ResyncRequired si des modifications postérieures ont été évincées
+        """
+        with self._condition:
+            if wait and sequence == self.sequence:
+                self._condition.wait_for(lambda: self.sequence != sequence, timeout=wait)
+            oldest = self.oldest
+            if sequence < oldest or sequence > self.sequence:
+                raise ResyncRequired(oldest, self.sequence)
+            # Les séquences sont contiguës : position directe dans la file
+            start = len(self._changes) - (self.sequence - sequence)
+            changes = [self._changes[i] for i in range(start, min(start + limit, len(self._changes)))]
+            return changes, start + limit < len(self._changes)
+
+    def stats(self):
+        with self._condition:
+            return {
+                "epoch": self.epoch,
+                "latest": self.sequence,
+                "retained": len(self._changes),
+                "retention": self._changes.maxlen
+            }
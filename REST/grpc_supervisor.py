@@ -0,0 +1,184 @@
+"""
+Supervision du serveur gRPC de capteurs (grpc/server.py) depuis le processus REST
+- un seul serveur lancé : un second démarrage renvoie l'état du serveur existant
+  (y compris un serveur lancé hors de l'API, détecté par un appel de sonde)
+- PID suivi, sortie du serveur conservée (dernières lignes)
+- disponibilité confirmée par un vrai appel gRPC, et non par une attente fixe
+- arrêt et redémarrage non bloquants : le travail se poursuit en arrière-plan
+"""
+
+import subprocess
+import sys
+import threading
+import time
+from collections import deque
+
+from sensor_client import GRPC_DIR, SensorCallError
+
+# Délai maximal de démarrage (s) : le serveur répond habituellement en quelques centaines de ms
+READY_TIMEOUT = 10.0
+# Durée d'une tentative de sonde : entre deux tentatives, on vérifie que le processus vit encore
+PROBE_SLICE = 0.25
+# Serveur déjà à l'écoute ? (sonde rapide avant tout lancement)
+EXTERNAL_PROBE_TIMEOUT = 0.1
+# Délai accordé au serveur après SIGTERM avant SIGKILL (s)
+STOP_TIMEOUT = 5.0
+# Lignes de sortie du serveur conservées
+OUTPUT_LINES = 50
+
+SERVER_COMMAND = [sys.executable, '-u', 'server.py']
+
+
+class GrpcServerSupervisor:
+    """
+    Cycle de vie du serveur gRPC : stopped → starting → ready → stopping → stopped
+    (exited : le processus s'est terminé de lui-même, voir returncode et output)
+    """
+
+    def __init__(self, client, command=SERVER_COMMAND, cwd=GRPC_DIR,
+                 ready_timeout=READY_TIMEOUT, stop_timeout=STOP_TIMEOUT):
+        self.client = client
+        self.command = command
+        self.cwd = cwd
+        self.ready_timeout = ready_timeout
+        self.stop_timeout = stop_timeout
+        self.process = None
+        self.state = 'stopped'
+        self.external = False
+        self.started_at = None
+        self.ready_in = None
+        self.returncode = None
+        self.error = None
+        self.output = deque(maxlen=OUTPUT_LINES)
+        self._lock = threading.RLock()
+
+    def _running(self):
+        return self.process is not None and self.process.poll() is None
+
+    def start(self, wait=True):
+        """
+        Lance le serveur s'il ne tourne pas déjà, puis attend sa disponibilité
+        (wait=False : la sonde tourne en arrière-plan, l'état passe à 'ready' plus tard)
+        """
+        with self._lock:
+            if self._running():
+                process = self.process
+                if self.state != 'starting' or not wait:
+                    return self.status()
+            else:
+                try:
+                    self.client.probe(EXTERNAL_PROBE_TIMEOUT)
+                except SensorCallError:
+                    pass
+                else:
+                    # Port déjà servi par un serveur que l'API n'a pas lancé
+                    self.state, self.external, self.error = 'ready', True, None
+                    return self.status()
+
+                self.output.clear()
+                self.process = process = subprocess.Popen(
+                    self.command, cwd=self.cwd, stdin=subprocess.DEVNULL,
+                    stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True
+                )
+                self.state, self.external = 'starting', False
+                self.started_at, self.ready_in = time.time(), None
+                self.returncode = self.error = None
+                threading.Thread(target=self._watch, args=(process,), daemon=True).start()
+
+        if wait:
+            self._wait_ready(process)
+        else:
+            threading.Thread(target=self._wait_ready, args=(process,), daemon=True).start()
+        return self.status()
+
+    def _wait_ready(self, process):
+        """Sonde le serveur jusqu'à ce qu'il réponde, qu'il s'arrête ou que le délai expire"""
+        deadline = time.monotonic() + self.ready_timeout
+        start = time.monotonic()
+        while process.poll() is None:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                with self._lock:
+                    if self.process is process and self.state == 'starting':
+                        self.error = f"gRPC server not ready after {self.ready_timeout:g} s"
+                return
+            try:
+                self.client.probe(min(PROBE_SLICE, remaining))
+            except SensorCallError:
+                continue
+            with self._lock:
+                if self.process is process and self.state == 'starting':
+                    self.state = 'ready'
+                    self.ready_in = time.monotonic() - start
+                    # Les canaux partagés ont pu accumuler du backoff pendant l'arrêt : on les
+                    # remplace (les appels en cours terminent sur les anciens)
+                    self.client.reconnect()
+            return
+        self._exited(process, process.wait())
+
+    def _watch(self, process):
+        """Recueille la sortie du serveur puis son code de retour"""
+        for line in process.stdout:
+            self.output.append(line.rstrip('\n'))
+        self._exited(process, process.wait())
+
+    def _exited(self, process, returncode):
+        with self._lock:
+            if self.process is process and self.returncode is None:
+                self.returncode = returncode
+                if self.state != 'stopping':
+                    self.error = f"gRPC server exited with code {returncode}"
+                self.state = 'stopped' if self.state == 'stopping' else 'exited'
+
+    def stop(self, wait=False):
+        """Envoie SIGTERM (SIGKILL après stop_timeout) - sans attendre par défaut"""
+        with self._lock:
+            if not self._running():
+                return self.status()
+            process = self.process
+            self.state = 'stopping'
+            process.terminate()
+
+        def reap():
+            try:
+                process.wait(self.stop_timeout)
+            except subprocess.TimeoutExpired:
+                process.kill()
+                process.wait()
+
+        if wait:
+            reap()
+        else:
+            threading.Thread(target=reap, daemon=True).start()
+        return self.status()
+
+    def restart(self, wait=False):
+        """Arrête puis relance le serveur (wait=False : en arrière-plan)"""
+        def run():
+            self.stop(wait=True)
+            self.start(wait=True)
+
+        if wait:
+            run()
+        else:
+            with self._lock:
+                # L'état passe à 'stopping' avant le retour : la relance est visible tout de suite
+                if self._running():
+                    self.state = 'stopping'
+            threading.Thread(target=run, daemon=True).start()
+        return self.status()
+
+    def status(self):
+        with self._lock:
+            running = self._running()
+            return {
+                "state": self.state,
+                "pid": self.process.pid if running else None,
+                "external": self.external,
+                "target": self.client.target,
+                "uptime": round(time.time() - self.started_at, 3) if running else None,
+                "ready_in_ms": round(self.ready_in * 1000, 1) if self.ready_in is not None else None,
+                "returncode": self.returncode,
+                "error": self.error,
+                "output": list(self.output)
+            }
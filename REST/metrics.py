@@ -0,0 +1,125 @@
+"""
+Mesure des temps de réponse de l'API
+- histogrammes de latence par route, méthode et statut, à seaux fixes (format Prometheus)
+- phases d'une requête (lecture du store, ETag, liens, sérialisation...) mesurées par timed()
+  et restituées dans l'en-tête Server-Timing, et dans un histogramme par route et par phase
+- coût minimal par requête : deux lectures d'horloge, un bisect et une incrémentation sous verrou
+
+Le temps mesuré va du début de la requête au dernier hook after_request (compression
+comprise) ; pour une réponse en streaming, il s'arrête au premier octet
+"""
+
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+from flask import g, request
+
+# Bornes supérieures des seaux (secondes), « le » de Prometheus
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Route des requêtes qui ne correspondent à aucune règle (404) : cardinalité bornée
+UNMATCHED_ROUTE = '<unmatched>'
+
+
+class Histogram:
+    """Histogramme à seaux fixes, une série par combinaison de labels"""
+
+    def __init__(self, name, help, label_names, buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.label_names = label_names
+        self.buckets = buckets
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, labels, value):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                # Compteurs par seau (non cumulés) + seau +Inf, puis somme
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def expose(self):
+        """Lignes au format d'exposition texte de Prometheus"""
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            snapshot = sorted((labels, list(counts), total) for labels, (counts, total) in self._series.items())
+        for labels, counts, total in snapshot:
+            base = ",".join(f'{name}="{_escape(value)}"' for name, value in zip(self.label_names, labels))
+            cumulative = 0
+            for bound, count in zip((*self.buckets, '+Inf'), counts):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{{{base},le="{bound}"}} {cumulative}')
+            lines.append(f"{self.name}_sum{{{base}}} {total}")
+            lines.append(f"{self.name}_count{{{base}}} {cumulative}")
+        return lines
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+@contextmanager
+def timed(phase):
+    """Mesure une phase de la requête courante (cumulée si la phase se répète)"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        phases = g.setdefault('phases', {})
+        phases[phase] = phases.get(phase, 0.0) + time.perf_counter() - start
+
+
+class Metrics:
+    def __init__(self):
+        self.requests = Histogram(
+            'http_request_duration_seconds', 'Latence des requêtes HTTP par route, méthode et statut',
+            ('method', 'route', 'status'))
+        self.phases = Histogram(
+            'http_request_phase_duration_seconds', 'Durée des phases d\'une requête (Server-Timing)',
+            ('route', 'phase'))
+        # Autres sources de métriques : fonctions retournant des lignes au format Prometheus
+        self.collectors = []
+
+    def expose(self):
+        lines = [*self.requests.expose(), *self.phases.expose()]
+        for collect in self.collectors:
+            lines += collect()
+        return "\n".join(lines) + "\n"
+
+
+def init_metrics(app, server_timing=True):
+    """
+    Installe la mesure des requêtes sur une application Flask
+    À appeler avant les autres after_request (Flask les exécute dans l'ordre inverse :
+    le temps mesuré inclut alors la compression)
+    """
+    metrics = Metrics()
+
+    @app.before_request
+    def start_timer():
+        g.request_start = time.perf_counter()
+
+    @app.after_request
+    def record_latency(response):
+        start = g.get('request_start')
+        if start is None:
+            return response
+        elapsed = time.perf_counter() - start
+        route = request.url_rule.rule if request.url_rule is not None else UNMATCHED_ROUTE
+        metrics.requests.observe((request.method, route, str(response.status_code)), elapsed)
+        phases = g.get('phases', {})
+        for phase, duration in phases.items():
+            metrics.phases.observe((route, phase), duration)
+        if server_timing:
+            entries = [f"{phase};dur={duration * 1000:.3f}" for phase, duration in phases.items()]
+            entries.append(f"total;dur={elapsed * 1000:.3f}")
+            response.headers['Server-Timing'] = ", ".join(entries)
+        return response
+
+    return metrics
@@ -0,0 +1,250 @@
+"""
+Cache des réponses GET déjà sérialisées (corps JSON + en-têtes)
+- LRU borné par la taille totale des corps
+- clé : paramètres de requête normalisés (ordre indifférent, valeurs vides conservées :
+  ?cursor= ou ?fields= ne donnent pas la même réponse que l'absence du paramètre)
+- invalidation précise : une écriture n'évince que les entrées dont les filtres
+  pouvaient contenir la destination modifiée (avant ou après l'écriture)
+- entrées indexées par dépendance (id, pays, listes sans filtre de pays) : une écriture
+  n'examine que les entrées de ses ids et de ses pays, pas tout le cache
+- coalescence (single-flight) : des requêtes identiques simultanées partagent un seul calcul
+"""
+
+import threading
+from collections import OrderedDict
+
+from store import _searchable_tokens, fold, tokenize
+
+# Budget mémoire des corps en cache (octets)
+RESPONSE_CACHE_MAX_BYTES = 16 * 1024 * 1024
+
+# Au-delà de ce nombre de destinations modifiées par une écriture (import en masse), les
+# listes concernées sont évincées sans tester leurs filtres
+PRECISE_INVALIDATION_LIMIT = 64
+
+# Dépendance des listes sans filtre de pays
+ALL_LISTS = ('lists',)
+
+
+def cache_key(host_url, path, args):
+    """Clé normalisée d'une requête GET : ?b=2&a=1 et ?a=1&b=2 partagent leur entrée"""
+    return (host_url, path, tuple(sorted((name, value) for name, value in args.items(multi=True))))
+
+
+def collection_filter(country=None, min_price=None, max_price=None, activity=None, q=None):
+    """
+    Prédicat d'une liste filtrée : la destination peut-elle en faire partie ?
+    Mêmes règles que DestinationStore.page (casse et accents ignorés)
+    """
+    country_key = country.lower() if country is not None else None
+    activity_key = fold(activity) if activity is not None else None
+    query_tokens = set(tokenize(q)) if q else None
+
+    def matches(destination):
+        if country_key is not None and destination['country'].lower() != country_key:
+            return False
+        price = destination['price_per_day']
+        if (min_price is not None and price < min_price) or (max_price is not None and price > max_price):
+            return False
+        if activity_key is not None and activity_key not in {fold(a) for a in destination['activities']}:
+            return False
+        if query_tokens is not None and not query_tokens & _searchable_tokens(destination):
+            return False
+        return True
+    return matches
+
+
+def collection_dependency(country=None, min_price=None, max_price=None, activity=None, q=None):
+    """Dépendance d'une liste : (pays filtré ou toutes les listes, prédicat des filtres)"""
+    dependency = ('country', country.lower()) if country is not None else ALL_LISTS
+    return dependency, collection_filter(country, min_price, max_price, activity, q)
+
+
+def item_dependency(id):
+    """Dépendance d'une destination seule : évincée à chaque écriture de cet id"""
+    return ('id', id), None
+
+
+class CachedResponse:
+    __slots__ = ('body', 'headers', 'dependency', 'matches')
+
+    def __init__(self, body, headers, dependency, matches):
+        self.body = body
+        self.headers = headers
+        self.dependency = dependency
+        self.matches = matches
+
+    @property
+    def etag(self):
+        return self.headers.get('ETag')
+
+
+class ResponseCache:
+    """
+    Réponses sérialisées, invalidées par les écritures du store (store.on_change)
+    Une réponse n'est mise en cache que si aucune écriture n'a eu lieu depuis la
+    lecture qui l'a produite : une entrée ne peut pas survivre à une invalidation
+    """
+
+    def __init__(self, store, max_bytes=RESPONSE_CACHE_MAX_BYTES):
+        self.store = store
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._entries = OrderedDict()
+        # Dépendance → clés des entrées qui en dépendent
+        self._dependents = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        store.on_change(self.invalidate)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        """Présence d'une entrée, sans compter de hit ni toucher à l'ordre LRU"""
+        return key in self._entries
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key, body, headers, dependency, revision):
+        """
+        Ajoute une réponse produite à la révision donnée (ignorée si le store a changé depuis)
+        dependency : (dépendance, prédicat), voir collection_dependency / item_dependency
+        """
+        if len(body) > self.max_bytes:
+            return
+        dependency, matches = dependency
+        with self._lock:
+            if self.store.revision != revision:
+                return
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = CachedResponse(body, headers, dependency, matches)
+            self._dependents.setdefault(dependency, set()).add(key)
+            self.size += len(body)
+            while self.size > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def invalidate(self, changes):
+        """
+        Listener du store, une fois par écriture publiée : évince les entrées qui pouvaient
+        contenir une destination modifiée, avant ou après l'écriture
+        Ids et pays modifiés sont dédupliqués ; seules les entrées qui en dépendent et les
+        listes sans filtre de pays sont examinées
+        """
+        ids = set()
+        by_country = {}
+        destinations = []
+        for before, after in changes:
+            for destination in (before, after):
+                if destination is not None:
+                    ids.add(destination['id'])
+                    by_country.setdefault(destination['country'].lower(), []).append(destination)
+                    destinations.append(destination)
+
+        with self._lock:
+            stale = set()
+            for id in ids:
+                stale.update(self._dependents.get(('id', id), ()))
+            for country, country_destinations in by_country.items():
+                stale.update(self._stale_lists(('country', country), country_destinations))
+            stale.update(self._stale_lists(ALL_LISTS, destinations))
+            for key in stale:
+                self._remove(key)
+            self.invalidations += len(stale)
+
+    def _stale_lists(self, dependency, destinations):
+        """Listes de cette dépendance qui pouvaient contenir l'une des destinations"""
+        keys = self._dependents.get(dependency)
+        if not keys or len(destinations) > PRECISE_INVALIDATION_LIMIT:
+            return keys or ()
+        return [key for key in keys
+                if any(self._entries[key].matches(destination) for destination in destinations)]
+
+    def _remove(self, key):
+        entry = self._entries.pop(key)
+        self.size -= len(entry.body)
+        keys = self._dependents[entry.dependency]
+        keys.discard(key)
+        if not keys:
+            del self._dependents[entry.dependency]
+
+    def stats(self):
+        return {
+            "entries": len(self._entries),
+            "bytes": self.size,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations
+        }
+
+
+class _Call:
+    __slots__ = ('done', 'result', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Un seul calcul en cours par clé : les appels concurrents avec la même clé
+    attendent le premier (le « leader ») et reçoivent son résultat ou son exception
+    La clé n'est libérée qu'à la fin du calcul : un appel arrivé après reçoit un calcul frais
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.executions = 0
+        self.coalesced = 0
+
+    def do(self, key, function):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.executions += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = function()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+    def stats(self):
+        return {
+            "in_flight": len(self._calls),
+            "executions": self.executions,
+            "coalesced": self.coalesced
+        }
@@ -0,0 +1,217 @@
+"""
+Client gRPC du service de capteurs (grpc/server.py), partagé par toutes les requêtes REST
+- canaux gRPC ouverts une seule fois et réutilisés (un canal multiplexe les appels en HTTP/2)
+- petit pool de canaux parcouru à tour de rôle, sûr entre threads
+- délai maximal (deadline) par appel
+- reconnexion automatique du canal avec backoff exponentiel, et nouvel essai des
+  appels refusés (UNAVAILABLE) tant que la deadline le permet
+- lecture groupée : les appels d'un lot partent en parallèle sur les canaux ouverts
+
+Le sensor_id est transmis comme champ du message protobuf : aucun code n'est généré
+à partir des données de la requête
+"""
+
+import itertools
+import os
+import sys
+import threading
+import time
+
+try:
+    import grpc
+except ImportError:  # grpcio est optionnel pour l'API REST
+    grpc = None
+
+# Les modules générés (sensor_pb2, sensor_pb2_grpc) sont compilés dans le dossier grpc/
+GRPC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'grpc')
+
+DEFAULT_TARGET = 'localhost:50051'
+DEFAULT_TIMEOUT = 2.0
+POOL_SIZE = 2
+# Nouvel essai des appels UNAVAILABLE : 50 ms, 100 ms, 200 ms... dans la limite de la deadline
+# (seul mécanisme de nouvel essai : aucune retryPolicy n'est configurée sur les canaux)
+RETRY_BACKOFF = 0.05
+RETRY_BACKOFF_MAX = 1.0
+# Marge (s) avant de fermer les canaux remplacés, au-delà de la plus longue deadline d'appel
+CLOSE_GRACE = 1.0
+
+CHANNEL_OPTIONS = [
+    ('grpc.initial_reconnect_backoff_ms', 100),
+    ('grpc.min_reconnect_backoff_ms', 100),
+    ('grpc.max_reconnect_backoff_ms', 5000),
+    ('grpc.keepalive_time_ms', 30000),
+    ('grpc.keepalive_timeout_ms', 5000),
+    ('grpc.keepalive_permit_without_calls', 1),
+]
+
+# Sonde de disponibilité : canal dédié qui retente la connexion toutes les 20 ms
+PROBE_SENSOR_ID = '__readiness__'
+PROBE_CHANNEL_OPTIONS = [
+    ('grpc.initial_reconnect_backoff_ms', 20),
+    ('grpc.min_reconnect_backoff_ms', 20),
+    ('grpc.max_reconnect_backoff_ms', 20),
+]
+
+
+class SensorUnavailableError(Exception):
+    """grpcio ou les modules générés à partir de sensor.proto sont absents"""
+
+
+class SensorCallError(Exception):
+    """Échec d'un appel gRPC : code de statut gRPC (ex: 'UNAVAILABLE') et détails"""
+
+    def __init__(self, code, details):
+        super().__init__(f"{code}: {details}")
+        self.code = code
+        self.details = details
+
+    @classmethod
+    def from_rpc_error(cls, error):
+        return cls(error.code().name, error.details() or error.code().name)
+
+
+def _load_generated_modules():
+    if grpc is None:
+        raise SensorUnavailableError("grpcio is not installed (pip install grpcio)")
+    if GRPC_DIR not in sys.path:
+        sys.path.append(GRPC_DIR)
+    try:
+        import sensor_pb2
+        import sensor_pb2_grpc
+    except ImportError as e:
+        raise SensorUnavailableError(
+            "sensor_pb2 modules not found - compile the contract in grpc/: "
+            "python -m grpc_tools.protoc -I. --python_out=. --grpc_python_out=. sensor.proto"
+        ) from e
+    return sensor_pb2, sensor_pb2_grpc
+
+
+def _reading(sensor_id, response):
+    return {
+        "sensor_id": sensor_id,
+        "temperature": round(response.temperature, 2),
+        "unit": response.unit
+    }
+
+
+class SensorClient:
+    """
+    Pool de canaux gRPC vers le service Sensor, créé au premier appel
+    Un canal gRPC est sûr entre threads : le pool ne sert qu'à répartir la charge
+    sur plusieurs connexions HTTP/2
+    """
+
+    def __init__(self, target=DEFAULT_TARGET, timeout=DEFAULT_TIMEOUT, pool_size=POOL_SIZE):
+        self.target = target
+        self.timeout = timeout
+        self.pool_size = pool_size
+        # (canaux, stubs), remplacé d'un bloc : un appel lit le pool une seule fois
+        self._pool = None
+        self._next = itertools.count()
+        self._lock = threading.Lock()
+        self._pb2 = None
+        # Plus longue deadline demandée : délai avant de fermer des canaux remplacés
+        self._longest_timeout = timeout
+
+    def _open_pool(self):
+        self._pb2, pb2_grpc = _load_generated_modules()
+        channels = [grpc.insecure_channel(self.target, options=CHANNEL_OPTIONS) for _ in range(self.pool_size)]
+        return channels, [pb2_grpc.SensorStub(channel) for channel in channels]
+
+    def _stub(self):
+        """Stub du canal suivant (ouverture paresseuse du pool)"""
+        pool = self._pool
+        if pool is None:
+            with self._lock:
+                if self._pool is None:
+                    self._pool = self._open_pool()
+                pool = self._pool
+        stubs = pool[1]
+        return stubs[next(self._next) % len(stubs)]
+
+    def get_temperature(self, sensor_id, timeout=None):
+        """
+        Lit un capteur - lève SensorCallError (DEADLINE_EXCEEDED, UNAVAILABLE...)
+        Les refus UNAVAILABLE (serveur en cours de démarrage, connexion perdue) sont
+        rejoués avec un backoff exponentiel tant que la deadline n'est pas atteinte
+        """
+        timeout = self.timeout if timeout is None else timeout
+        self._longest_timeout = max(self._longest_timeout, timeout)
+        deadline = time.monotonic() + timeout
+        backoff = RETRY_BACKOFF
+        while True:
+            stub = self._stub()
+            remaining = deadline - time.monotonic()
+            try:
+                response = stub.GetTemperature(self._pb2.SensorRequest(sensor_id=sensor_id), timeout=remaining)
+                return _reading(sensor_id, response)
+            except grpc.RpcError as e:
+                remaining = deadline - time.monotonic()
+                if e.code() != grpc.StatusCode.UNAVAILABLE or remaining <= backoff:
+                    raise SensorCallError.from_rpc_error(e) from e
+                time.sleep(backoff)
+                backoff = min(backoff * 2, RETRY_BACKOFF_MAX)
+
+    def get_temperatures(self, sensor_ids, timeout=None):
+        """
+        Lit plusieurs capteurs en parallèle (appels asynchrones sur les canaux du pool)
+        Retourne une liste de résultats dans l'ordre des ids : lecture ou erreur par capteur
+        """
+        timeout = self.timeout if timeout is None else timeout
+        self._longest_timeout = max(self._longest_timeout, timeout)
+        calls = [
+            (sensor_id, self._stub().GetTemperature.future(self._pb2.SensorRequest(sensor_id=sensor_id),
+                                                           timeout=timeout))
+            for sensor_id in sensor_ids
+        ]
+        results = []
+        for sensor_id, call in calls:
+            try:
+                results.append(_reading(sensor_id, call.result()))
+            except grpc.RpcError as e:
+                error = SensorCallError.from_rpc_error(e)
+                results.append({"sensor_id": sensor_id, "error": error.details, "code": error.code})
+        return results
+
+    def probe(self, timeout):
+        """
+        Vérifie que le serveur répond à un vrai appel GetTemperature
+        L'appel attend la connexion (wait_for_ready) au plus `timeout` secondes : il aboutit
+        dès que le serveur écoute - retourne la durée d'attente, lève SensorCallError
+        """
+        sensor_pb2, pb2_grpc = _load_generated_modules()
+        start = time.monotonic()
+        with grpc.insecure_channel(self.target, options=PROBE_CHANNEL_OPTIONS) as channel:
+            try:
+                pb2_grpc.SensorStub(channel).GetTemperature(
+                    sensor_pb2.SensorRequest(sensor_id=PROBE_SENSOR_ID), timeout=timeout, wait_for_ready=True)
+            except grpc.RpcError as e:
+                raise SensorCallError.from_rpc_error(e) from e
+        return time.monotonic() - start
+
+    def reconnect(self):
+        """
+        Remplace les canaux du pool par des canaux neufs (sans backoff de reconnexion accumulé)
+        Les nouveaux canaux sont publiés d'un bloc ; les anciens ne sont fermés qu'après la plus
+        longue deadline d'appel, une fois les appels en cours terminés
+        """
+        with self._lock:
+            previous = self._pool
+            if previous is None:
+                return
+            self._pool = self._open_pool()
+        closer = threading.Timer(self._longest_timeout + CLOSE_GRACE, self._close_channels, (previous[0],))
+        closer.daemon = True
+        closer.start()
+
+    @staticmethod
+    def _close_channels(channels):
+        for channel in channels:
+            channel.close()
+
+    def close(self):
+        """Ferme les canaux du pool (rouverts au prochain appel) - à l'arrêt, appels terminés"""
+        with self._lock:
+            previous, self._pool = self._pool, None
+        if previous is not None:
+            self._close_channels(previous[0])
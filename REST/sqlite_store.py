@@ -0,0 +1,417 @@
+"""
+Stockage SQLite des destinations (mode persistant)
+Même interface que DestinationStore : les handlers REST, les ETags, les 409 et les
+en-têtes Location sont identiques quel que soit le backend
+- WAL : les lectures ne bloquent pas les écritures
+- une connexion par thread, requêtes paramétrées (préparées et mises en cache par sqlite3)
+- index sur id, (name, country), pays et prix
+- transactions groupées pour les écritures en masse
+"""
+
+import json
+import sqlite3
+import threading
+import uuid
+from contextlib import contextmanager
+
+from store import DuplicateDestinationError, _searchable_tokens, fold, make_sort_key, tokenize
+
+# price_per_day sans type déclaré (aucune affinité) : la valeur est relue telle qu'écrite
+# (150.0 reste un flottant, 150 un entier), comme avec le stockage en mémoire ; la
+# comparaison entre entiers et flottants reste numérique pour l'index des prix
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS destinations (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL,
+    country TEXT NOT NULL,
+    price_per_day NOT NULL,
+    activities TEXT NOT NULL,
+    name_key TEXT NOT NULL,
+    country_key TEXT NOT NULL,
+    version INTEGER NOT NULL
+);
+CREATE UNIQUE INDEX IF NOT EXISTS ux_destinations_name_country ON destinations (name_key, country_key);
+CREATE INDEX IF NOT EXISTS ix_destinations_price ON destinations (price_per_day, id);
+CREATE INDEX IF NOT EXISTS ix_destinations_name ON destinations (name_key, id);
+CREATE INDEX IF NOT EXISTS ix_destinations_country_id ON destinations (country_key, id);
+CREATE INDEX IF NOT EXISTS ix_destinations_country_price ON destinations (country_key, price_per_day, id);
+CREATE INDEX IF NOT EXISTS ix_destinations_country_name ON destinations (country_key, name_key, id);
+
+CREATE TABLE IF NOT EXISTS destination_activities (
+    activity_key TEXT NOT NULL,
+    id INTEGER NOT NULL,
+    PRIMARY KEY (activity_key, id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS ix_destination_activities_id ON destination_activities (id);
+
+CREATE TABLE IF NOT EXISTS destination_tokens (
+    token TEXT NOT NULL,
+    id INTEGER NOT NULL,
+    PRIMARY KEY (token, id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS ix_destination_tokens_id ON destination_tokens (id);
+
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+# Colonne SQL correspondant à chaque tri (l'id départage les égalités)
+SORT_COLUMNS = {
+    'id': 'd.id',
+    'name': 'd.name_key',
+    'price_per_day': 'd.price_per_day',
+    'relevance': 'm.neg_score',
+}
+
+COLUMNS = "d.id, d.name, d.country, d.price_per_day, d.activities"
+
+SELECT_BY_ID = f"SELECT {COLUMNS} FROM destinations d WHERE d.id = ?"
+SELECT_BY_KEY = "SELECT id FROM destinations WHERE name_key = ? AND country_key = ?"
+SELECT_VERSION = "SELECT version FROM destinations WHERE id = ?"
+SELECT_META = "SELECT value FROM meta WHERE key = ?"
+UPSERT_META = "INSERT INTO meta (key, value) VALUES (?, ?) ON CONFLICT (key) DO UPDATE SET value = excluded.value"
+INSERT_DESTINATION = """
+INSERT INTO destinations (id, name, country, price_per_day, activities, name_key, country_key, version)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+"""
+UPDATE_DESTINATION = """
+UPDATE destinations
+SET name = ?, country = ?, price_per_day = ?, activities = ?, name_key = ?, country_key = ?, version = ?
+WHERE id = ?
+"""
+DELETE_DESTINATION = "DELETE FROM destinations WHERE id = ?"
+INSERT_ACTIVITY = "INSERT OR IGNORE INTO destination_activities (activity_key, id) VALUES (?, ?)"
+DELETE_ACTIVITIES = "DELETE FROM destination_activities WHERE id = ?"
+INSERT_TOKEN = "INSERT OR IGNORE INTO destination_tokens (token, id) VALUES (?, ?)"
+DELETE_TOKENS = "DELETE FROM destination_tokens WHERE id = ?"
+
+
+def _row_to_destination(row):
+    id, name, country, price_per_day, activities = row
+    return {
+        "id": id,
+        "name": name,
+        "country": country,
+        "price_per_day": price_per_day,
+        "activities": json.loads(activities)
+    }
+
+
+class SQLiteDestinationStore:
+    """
+    Stockage persistant des destinations dans une base SQLite
+    La révision globale, le compteur de versions et l'epoch sont conservés dans
+    la table meta : les ETags restent valides après un redémarrage
+    """
+
+    sort_key = staticmethod(make_sort_key)
+
+    def __init__(self, path, destinations=()):
+        self.path = path
+        self._local = threading.local()
+        # Un seul écrivain à la fois dans ce processus (BEGIN IMMEDIATE sérialise
+        # aussi les écrivains des autres processus)
+        self._write_lock = threading.RLock()
+        self._listeners = []
+        self._notifying = threading.RLock()
+
+        connection = self._connection()
+        connection.executescript(SCHEMA)
+        if self._meta('epoch') is None:
+            with self.transaction():
+                self._set_meta('epoch', uuid.uuid4().hex[:8])
+                self._set_meta('revision', 0)
+                self._set_meta('version_counter', 0)
+                for destination in destinations:
+                    self._insert(dict(destination), version=0)
+        self.epoch = self._meta('epoch')
+
+    # ── Connexions ──
+
+    def _connection(self):
+        """Connexion propre au thread courant (les connexions sqlite3 ne se partagent pas)"""
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=30, isolation_level=None,
+                                         cached_statements=256)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.execute("PRAGMA foreign_keys=ON")
+            self._local.connection = connection
+            self._local.depth = 0
+            self._local.events = []
+        return connection
+
+    def _meta(self, key):
+        row = self._connection().execute(SELECT_META, (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, key, value):
+        self._connection().execute(UPSERT_META, (key, str(value)))
+
+    @property
+    def revision(self):
+        return int(self._meta('revision') or 0)
+
+    def __len__(self):
+        return self._connection().execute("SELECT COUNT(*) FROM destinations").fetchone()[0]
+
+    def __iter__(self):
+        return iter(self.all())
+
+    # ── Lectures ──
+
+    def get(self, id):
+        row = self._connection().execute(SELECT_BY_ID, (id,)).fetchone()
+        return _row_to_destination(row) if row else None
+
+    def find_duplicate(self, name, country, exclude_id=None):
+        row = self._connection().execute(SELECT_BY_KEY, (name.lower(), country.lower())).fetchone()
+        if row is None or row[0] == exclude_id:
+            return None
+        return self.get(row[0])
+
+    def by_country(self, country):
+        return self.page(country=country)[0]
+
+    def all(self):
+        rows = self._connection().execute(f"SELECT {COLUMNS} FROM destinations d ORDER BY d.id")
+        return [_row_to_destination(row) for row in rows]
+
+    def version(self, id):
+        row = self._connection().execute(SELECT_VERSION, (id,)).fetchone()
+        return row[0] if row else None
+
+    def versions(self, ids):
+        """Versions de plusieurs destinations en une seule requête"""
+        ids = list(ids)
+        if not ids:
+            return []
+        placeholders = ','.join('?' * len(ids))
+        rows = self._connection().execute(
+            f"SELECT id, version FROM destinations WHERE id IN ({placeholders})", ids)
+        versions = dict(rows.fetchall())
+        return [versions.get(id) for id in ids]
+
+    def read(self, function):
+        """
+        Exécute plusieurs lectures sur un même instantané
+        (transaction de lecture : en WAL, elle ne bloque pas les écrivains)
+        """
+        connection = self._connection()
+        if connection.in_transaction:
+            return function()
+        connection.execute("BEGIN")
+        try:
+            return function()
+        finally:
+            connection.execute("COMMIT")
+
+    def page(self, sort='id', country=None, after=None, before=None, limit=None,
+             min_price=None, max_price=None, activity=None, q=None):
+        """
+        Pagination par clé (keyset) traduite en SQL : les index (country_key, prix, id),
+        (name_key, id)... servent à la fois au filtre, au tri et à la reprise du curseur
+        """
+        params = []
+        ctes = []
+        joins = []
+        where = []
+
+        if q:
+            tokens = sorted(set(tokenize(q)))
+            if not tokens:
+                return [], False
+            placeholders = ','.join('?' * len(tokens))
+            ctes.append(f"matches AS (SELECT id, -COUNT(*) AS neg_score FROM destination_tokens "
+                        f"WHERE token IN ({placeholders}) GROUP BY id)")
+            params.extend(tokens)
+            joins.append("JOIN matches m ON m.id = d.id")
+        elif sort == 'relevance':
+            raise ValueError("sort=relevance requires q")
+
+        if activity is not None:
+            where.append("d.id IN (SELECT id FROM destination_activities WHERE activity_key = ?)")
+            params.append(fold(activity))
+        if country is not None:
+            where.append("d.country_key = ?")
+            params.append(country.lower())
+        if min_price is not None:
+            where.append("d.price_per_day >= ?")
+            params.append(min_price)
+        if max_price is not None:
+            where.append("d.price_per_day <= ?")
+            params.append(max_price)
+
+        column = SORT_COLUMNS[sort]
+        reverse = before is not None
+        cursor = before if reverse else after
+        if cursor is not None:
+            where.append(f"({column}, d.id) {'<' if reverse else '>'} (?, ?)")
+            params.extend(cursor)
+
+        direction = "DESC" if reverse else "ASC"
+        sql = (
+            (f"WITH {', '.join(ctes)} " if ctes else "")
+            + f"SELECT {COLUMNS} FROM destinations d {' '.join(joins)}"
+            + (f" WHERE {' AND '.join(where)}" if where else "")
+            + f" ORDER BY {column} {direction}, d.id {direction}"
+        )
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit + 1)
+
+        results = [_row_to_destination(row) for row in self._connection().execute(sql, params)]
+        has_more = limit is not None and len(results) > limit
+        if has_more:
+            results.pop()
+        if reverse:
+            results.reverse()
+        return results, has_more
+
+    # ── Écritures ──
+
+    def on_change(self, listener):
+        """
+        Abonne listener(changes) aux écritures validées : liste des (avant, après) de la
+        transaction, None pour une création ou une suppression
+        Appelé une fois par transaction, après COMMIT et hors du verrou d'écriture, dans
+        l'ordre des transactions ; jamais pour une transaction annulée
+        """
+        self._listeners.append(listener)
+        return listener
+
+    @contextmanager
+    def transaction(self):
+        """
+        Transaction SQLite (BEGIN IMMEDIATE ... COMMIT / ROLLBACK)
+        Les écritures imbriquées rejoignent la transaction englobante
+        """
+        connection = self._connection()
+        events = None
+        try:
+            with self._write_lock:
+                if self._local.depth:
+                    self._local.depth += 1
+                    try:
+                        yield self
+                    finally:
+                        self._local.depth -= 1
+                    return
+
+                connection.execute("BEGIN IMMEDIATE")
+                self._local.depth = 1
+                try:
+                    yield self
+                except BaseException:
+                    connection.execute("ROLLBACK")
+                    self._local.events = []
+                    raise
+                else:
+                    connection.execute("COMMIT")
+                    events, self._local.events = self._local.events, []
+                    if events and self._listeners:
+                        # Pris avant de rendre le verrou d'écriture : notifications dans l'ordre
+                        self._notifying.acquire()
+                    else:
+                        events = None
+                finally:
+                    self._local.depth = 0
+        finally:
+            if events:
+                try:
+                    for listener in self._listeners:
+                        listener(events)
+                finally:
+                    self._notifying.release()
+
+    # Un lot d'écritures indépendantes partage une seule transaction (un seul fsync)
+    batch = transaction
+
+    def create(self, data):
+        with self.transaction():
+            existing = self.find_duplicate(data['name'], data['country'])
+            if existing:
+                raise DuplicateDestinationError(existing)
+            destination = {
+                "id": self._next_id(),
+                "name": data['name'],
+                "country": data['country'],
+                "price_per_day": data['price_per_day'],
+                "activities": data.get('activities', [])
+            }
+            self._insert(destination, version=self._bump_version())
+            self._local.events.append((None, destination))
+            return destination
+
+    def update(self, id, changes):
+        with self.transaction():
+            before = self.get(id)
+            if before is None:
+                raise KeyError(id)
+            name = changes.get('name', before['name'])
+            country = changes.get('country', before['country'])
+            existing = self.find_duplicate(name, country, exclude_id=id)
+            if existing:
+                raise DuplicateDestinationError(existing)
+
+            destination = dict(before)
+            for field in ('name', 'country', 'price_per_day', 'activities'):
+                if field in changes:
+                    destination[field] = changes[field]
+            connection = self._connection()
+            connection.execute(UPDATE_DESTINATION, (
+                destination['name'], destination['country'], destination['price_per_day'],
+                json.dumps(destination['activities']), destination['name'].lower(),
+                destination['country'].lower(), self._bump_version(), id
+            ))
+            self._unindex_text(id)
+            self._index_text(destination)
+            self._local.events.append((before, destination))
+            return destination
+
+    def delete(self, id):
+        with self.transaction():
+            destination = self.get(id)
+            if destination is not None:
+                connection = self._connection()
+                connection.execute(DELETE_DESTINATION, (id,))
+                self._unindex_text(id)
+                self._set_meta('revision', self.revision + 1)
+                self._local.events.append((destination, None))
+            return destination
+
+    # ── Maintenance ──
+
+    def _next_id(self):
+        row = self._connection().execute(
+            "SELECT seq FROM sqlite_sequence WHERE name = 'destinations'").fetchone()
+        return (row[0] if row else 0) + 1
+
+    def _bump_version(self):
+        """Nouvelle version (compteur global) et révision suivante - dans la transaction courante"""
+        version = int(self._meta('version_counter')) + 1
+        self._set_meta('version_counter', version)
+        self._set_meta('revision', self.revision + 1)
+        return version
+
+    def _insert(self, destination, version):
+        self._connection().execute(INSERT_DESTINATION, (
+            destination['id'], destination['name'], destination['country'],
+            destination['price_per_day'], json.dumps(destination['activities']),
+            destination['name'].lower(), destination['country'].lower(), version
+        ))
+        self._index_text(destination)
+
+    def _index_text(self, destination):
+        connection = self._connection()
+        id = destination['id']
+        connection.executemany(INSERT_ACTIVITY, ((fold(activity), id) for activity in destination['activities']))
+        connection.executemany(INSERT_TOKEN, ((token, id) for token in _searchable_tokens(destination)))
+
+    def _unindex_text(self, id):
+        connection = self._connection()
+        connection.execute(DELETE_ACTIVITIES, (id,))
+        connection.execute(DELETE_TOKENS, (id,))
@@ -0,0 +1,936 @@
+"""
+Stockage en mémoire des destinations avec index
+Remplace les parcours linéaires (next(d for d in destinations ...)) par des
+recherches en temps constant
+
+Accès concurrents (serveur multi-thread) :
+- les écrivains sont sérialisés par un verrou : allocation de l'id, détection
+  des doublons et insertion sont atomiques
+- les lecteurs ne prennent pas de verrou et n'attendent jamais : ils lisent le dernier
+  état publié, que l'écrivain ne modifie plus (il travaille sur une copie des seuls
+  conteneurs qu'il touche, publiée d'un coup à la fin de l'écriture)
+- les destinations ne sont jamais modifiées en place (copie à l'écriture) :
+  une destination déjà lue reste cohérente pendant sa sérialisation
+"""
+
+import bisect
+import re
+import threading
+import unicodedata
+import uuid
+from contextlib import contextmanager
+from itertools import accumulate
+from operator import itemgetter
+
+
+class DuplicateDestinationError(Exception):
+    """Levée quand le couple (name, country) existe déjà"""
+
+    def __init__(self, existing):
+        super().__init__(f"Destination already exists (id={existing['id']})")
+        self.existing = existing
+
+
+def _unique_key(name, country):
+    """Clé de l'index unique : (nom, pays) en minuscules"""
+    return (name.lower(), country.lower())
+
+
+def price_bounds(min_price=None, max_price=None):
+    """
+    Bornes exclusives sur l'index des prix pour min_price <= prix <= max_price
+    (-inf / +inf à la place de l'id encadrent toutes les clés de ce prix)
+    """
+    lower = None if min_price is None else (min_price, float('-inf'))
+    upper = None if max_price is None else (max_price, float('inf'))
+    return lower, upper
+
+
+def _tightest(choose, *bounds):
+    """Borne la plus restrictive parmi celles définies (None = non borné)"""
+    defined = [bound for bound in bounds if bound is not None]
+    return choose(defined) if defined else None
+
+
+def fold(text):
+    """
+    Normalise un texte pour la recherche : casse et accents supprimés
+    ("Champs-Élysées" → "champs-elysees")
+    """
+    decomposed = unicodedata.normalize('NFKD', text)
+    return ''.join(c for c in decomposed if not unicodedata.combining(c)).casefold()
+
+
+_TOKEN = re.compile(r'\w+')
+
+def tokenize(text):
+    """Découpe un texte normalisé en mots ("Champs-Élysées" → ["champs", "elysees"])"""
+    return _TOKEN.findall(fold(text))
+
+
+def _searchable_tokens(destination):
+    """Mots indexés pour la recherche plein texte : nom et activités"""
+    tokens = set(tokenize(destination['name']))
+    for activity in destination['activities']:
+        tokens.update(tokenize(activity))
+    return tokens
+
+
+# Champs de tri supportés → clé de tri ; l'id départage les égalités
+SORT_KEYS = {
+    'id': lambda d: (d['id'], d['id']),
+    'name': lambda d: (d['name'].lower(), d['id']),
+    'price_per_day': lambda d: (d['price_per_day'], d['id']),
+}
+
+
+def make_sort_key(sort, q=None):
+    """Fonction de clé de tri, y compris la pertinence pour une recherche q"""
+    if sort != 'relevance':
+        return SORT_KEYS[sort]
+    query_tokens = set(tokenize(q or ''))
+    return lambda d: (-len(query_tokens & _searchable_tokens(d)), d['id'])
+
+
+# Au-delà, une liste de l'index inversé est répartie (IdSet) : copiée à l'écriture,
+# elle ne duplique que le bloc modifié
+LARGE_POSTINGS = 2048
+
+
+class SortedIndex:
+    """
+    Index ordonné de clés (valeur, id) maintenu par bisect
+    Permet de reprendre un parcours après/avant une clé en O(log n)
+
+    Les clés sont rangées en blocs triés d'au plus 2 * LOAD clés : copy() ne copie que
+    la liste des blocs, et une modification ne duplique que le bloc qu'elle touche
+    (copie à l'écriture, voir _Snapshot) - une écriture coûte O(n / LOAD + LOAD)
+    au lieu d'une copie de tout l'index
+
+    Les insertions sont mises en attente et fusionnées par l'écrivain avant publication
+    (DestinationStore._writing) : quelques clés sont insérées une à une (insort), un gros
+    lot (import en masse) est fusionné par un seul tri
+    scan et count ne lisent que les clés fusionnées : un lecteur ne modifie jamais l'index
+    """
+
+    # Taille nominale d'un bloc
+    LOAD = 512
+    # Au-delà, les clés en attente sont fusionnées par un tri de tout l'index
+    MERGE_THRESHOLD = 64
+
+    def __init__(self):
+        self._chunks = []
+        # Plus grande clé de chaque bloc, position de départ de chaque bloc (+ total)
+        self._maxes = []
+        self._offsets = [0]
+        self._pending = []
+        # Blocs propres à cet index (les autres sont partagés avec sa copie d'origine)
+        self._owned = set()
+
+    def __len__(self):
+        return self._offsets[-1] + len(self._pending)
+
+    def copy(self):
+        index = SortedIndex.__new__(SortedIndex)
+        index._chunks = self._chunks.copy()
+        index._maxes = self._maxes.copy()
+        index._offsets = self._offsets.copy()
+        index._pending = self._pending.copy()
+        index._owned = set()
+        return index
+
+    def add(self, key):
+        self._pending.append(key)
+
+    def remove(self, key):
+        self._flush()
+        i = bisect.bisect_left(self._maxes, key)
+        if i == len(self._chunks):
+            return
+        chunk = self._chunks[i]
+        position = bisect.bisect_left(chunk, key)
+        if position < len(chunk) and chunk[position] == key:
+            chunk = self._own(i)
+            del chunk[position]
+            if not chunk:
+                del self._chunks[i]
+            self._reindex()
+
+    def scan(self, lower=None, upper=None, reverse=False):
+        """
+        Clés k telles que lower < k < upper (bornes exclusives, None = non borné)
+        Les bornes sont localisées par bisect en O(log n), puis seules les clés
+        visitées sont lues
+        """
+        start, stop = self._range(lower, upper)
+        if start >= stop:
+            return
+        chunks, offsets = self._chunks, self._offsets
+        if reverse:
+            i = bisect.bisect_right(offsets, stop - 1) - 1
+            end = stop - offsets[i]
+            while i >= 0 and offsets[i + 1] > start:
+                begin = max(start - offsets[i], 0)
+                yield from reversed(chunks[i][begin:end])
+                i -= 1
+                end = len(chunks[i]) if i >= 0 else 0
+        else:
+            i = bisect.bisect_right(offsets, start) - 1
+            begin = start - offsets[i]
+            while i < len(chunks) and offsets[i] < stop:
+                yield from chunks[i][begin:stop - offsets[i]]
+                i += 1
+                begin = 0
+
+    def count(self, lower=None, upper=None):
+        """Nombre de clés strictement entre lower et upper - O(log n)"""
+        start, stop = self._range(lower, upper)
+        return max(stop - start, 0)
+
+    def _range(self, lower, upper):
+        """Positions [start, stop) des clés strictement entre lower et upper"""
+        start = 0 if lower is None else self._position(lower, bisect.bisect_right)
+        stop = self._offsets[-1] if upper is None else self._position(upper, bisect.bisect_left)
+        return start, stop
+
+    def _position(self, key, search):
+        i = search(self._maxes, key)
+        if i == len(self._chunks):
+            return self._offsets[-1]
+        return self._offsets[i] + search(self._chunks[i], key)
+
+    def _own(self, i):
+        """Bloc i modifiable (dupliqué s'il est encore partagé)"""
+        chunk = self._chunks[i]
+        if id(chunk) not in self._owned:
+            chunk = self._chunks[i] = chunk.copy()
+            self._owned.add(id(chunk))
+        return chunk
+
+    def _reindex(self):
+        self._maxes = list(map(itemgetter(-1), self._chunks))
+        self._offsets = [0, *accumulate(map(len, self._chunks))]
+
+    def _flush(self):
+        if not self._pending:
+            return
+        if len(self._pending) < self.MERGE_THRESHOLD and self._chunks:
+            for key in self._pending:
+                i = min(bisect.bisect_left(self._maxes, key), len(self._chunks) - 1)
+                chunk = self._own(i)
+                bisect.insort(chunk, key)
+                self._maxes[i] = chunk[-1]
+                if len(chunk) > 2 * self.LOAD:
+                    self._chunks[i:i + 1] = [chunk[:self.LOAD], chunk[self.LOAD:]]
+                    self._owned.update(id(part) for part in self._chunks[i:i + 2])
+                    self._maxes[i:i + 1] = [self._chunks[i][-1], self._chunks[i + 1][-1]]
+        else:
+            keys = [key for chunk in self._chunks for key in chunk]
+            keys.extend(self._pending)
+            keys.sort()
+            self._chunks = [keys[i:i + self.LOAD] for i in range(0, len(keys), self.LOAD)]
+            self._owned = {id(chunk) for chunk in self._chunks}
+        self._pending = []
+        self._reindex()
+
+
+# Nombre de sous-dictionnaires d'un ShardedDict, taille (en bits) d'un bloc d'un IdDict
+SHARDS = 64
+ID_BLOCK_BITS = 11
+
+
+class ShardedDict:
+    """
+    dict réparti en sous-dictionnaires (route(clé) : hash de la clé modulo SHARDS)
+    copy() ne copie que la table des sous-dictionnaires, et une écriture ne duplique
+    que celui qu'elle modifie (copie à l'écriture en O(n / SHARDS))
+    """
+
+    __slots__ = ('shards', '_owned', '_size')
+
+    def __init__(self):
+        self.shards = {}
+        # Sous-dictionnaires propres à cette copie (les autres sont partagés)
+        self._owned = set()
+        self._size = 0
+
+    @staticmethod
+    def route(key):
+        return hash(key) % SHARDS
+
+    def copy(self):
+        copy = type(self).__new__(type(self))
+        copy.shards = self.shards.copy()
+        copy._owned = set()
+        copy._size = self._size
+        return copy
+
+    def __len__(self):
+        return self._size
+
+    def __iter__(self):
+        for shard in self.shards.values():
+            yield from shard
+
+    def __contains__(self, key):
+        shard = self.shards.get(self.route(key))
+        return shard is not None and key in shard
+
+    def __getitem__(self, key):
+        return self.shards[self.route(key)][key]
+
+    def get(self, key, default=None):
+        shard = self.shards.get(self.route(key))
+        return default if shard is None else shard.get(key, default)
+
+    def values(self):
+        for shard in self.shards.values():
+            yield from shard.values()
+
+    def __setitem__(self, key, value):
+        shard = self._own(self.route(key))
+        if key not in shard:
+            self._size += 1
+        shard[key] = value
+
+    def __delitem__(self, key):
+        route = self.route(key)
+        shard = self._own(route)
+        del shard[key]
+        self._size -= 1
+        if not shard:
+            del self.shards[route]
+
+    def pop(self, key, default=None):
+        if key not in self:
+            return default
+        value = self[key]
+        del self[key]
+        return value
+
+    def _own(self, route):
+        shard = self.shards.get(route)
+        if shard is None:
+            shard = self.shards[route] = {}
+        elif route in self._owned:
+            return shard
+        else:
+            shard = self.shards[route] = shard.copy()
+        self._owned.add(route)
+        return shard
+
+
+class IdDict(ShardedDict):
+    """
+    ShardedDict dont les clés sont des ids : un bloc par plage de 2 ** ID_BLOCK_BITS ids
+    Des ids voisins partagent leur bloc - les boucles de lecture chaudes (parcours dans
+    l'ordre d'un index) lisent directement shards[id >> ID_BLOCK_BITS][id]
+    """
+
+    __slots__ = ()
+
+    @staticmethod
+    def route(id):
+        return id >> ID_BLOCK_BITS
+
+
+class IdSet(IdDict):
+    """Ensemble d'ids réparti (IdDict sans valeurs), pour les longues listes d'ids"""
+
+    __slots__ = ()
+
+    def __init__(self, ids=()):
+        super().__init__()
+        for id in ids:
+            self[id] = None
+
+    def add(self, id):
+        self[id] = None
+
+    def discard(self, id):
+        self.pop(id)
+
+
+class _Snapshot:
+    """
+    État des index à un instant donné
+    - by_id      : id → destination
+    - by_key     : (name, country) en minuscules → id (index unique)
+    - sorted     : champ de tri → SortedIndex global
+    - by_country : pays en minuscules → {champ de tri: SortedIndex}
+    - by_activity : activité normalisée → {id} (filtre activity=)
+    - tokens     : mot normalisé → {id} (index inversé de la recherche q=)
+    - versions   : id → version ; revision : révision de la collection
+
+    Un état publié n'est plus jamais modifié : fork() en fait une copie qui partage
+    tous ses conteneurs, et l'écrivain duplique chaque conteneur à sa première
+    modification (own, own_item) - une écriture ne copie que ce qu'elle touche, et les
+    grands conteneurs (ShardedDict, IdDict, SortedIndex) ne dupliquent que le bloc modifié
+    """
+
+    __slots__ = ('by_id', 'by_key', 'sorted', 'by_country', 'by_activity', 'tokens',
+                 'versions', 'revision', '_owned')
+
+    def __init__(self):
+        self.by_id = IdDict()
+        self.by_key = ShardedDict()
+        self.sorted = {field: SortedIndex() for field in SORT_KEYS}
+        self.by_country = {}
+        self.by_activity = {}
+        self.tokens = ShardedDict()
+        self.versions = IdDict()
+        self.revision = 0
+        self._owned = None
+
+    def fork(self):
+        """Copie modifiable de cet état (aucun conteneur n'est encore dupliqué)"""
+        snapshot = _Snapshot.__new__(_Snapshot)
+        for name in self.__slots__:
+            setattr(snapshot, name, getattr(self, name))
+        # Conteneurs déjà dupliqués par cette écriture (id → conteneur, gardé vivant)
+        snapshot._owned = {}
+        return snapshot
+
+    def freeze(self):
+        """Fin de l'écriture : l'état devient publiable et ne doit plus changer"""
+        self._owned = None
+        return self
+
+    def own(self, name):
+        """Conteneur de premier niveau, dupliqué s'il est encore partagé avec l'état publié"""
+        container = getattr(self, name)
+        if id(container) not in self._owned:
+            container = container.copy()
+            setattr(self, name, container)
+            self._owned[id(container)] = container
+        return container
+
+    def own_item(self, mapping, key, factory):
+        """Valeur de mapping (déjà possédé) modifiable, créée par factory si absente"""
+        value = mapping.get(key)
+        if value is None:
+            value = mapping[key] = factory()
+        elif id(value) in self._owned:
+            return value
+        else:
+            value = mapping[key] = value.copy()
+        self._owned[id(value)] = value
+        return value
+
+    def add_posting(self, name, key, destination_id):
+        """Ajoute un id à une liste de l'index inversé (répartie au-delà de LARGE_POSTINGS ids)"""
+        postings = self.own(name)
+        ids = self.own_item(postings, key, set)
+        if type(ids) is set and len(ids) >= LARGE_POSTINGS:
+            ids = postings[key] = IdSet(ids)
+            self._owned[id(ids)] = ids
+        ids.add(destination_id)
+
+    def discard(self, name, key, id):
+        """Retire un id d'une liste de l'index inversé (et la liste si elle devient vide)"""
+        postings = getattr(self, name)
+        if id not in postings.get(key, ()):
+            return
+        postings = self.own(name)
+        ids = self.own_item(postings, key, set)
+        ids.discard(id)
+        if not ids:
+            del postings[key]
+
+
+class DestinationStore:
+    """
+    Stockage indexé des destinations (index décrits par _Snapshot)
+    Tous les index sont mis à jour à chaque écriture
+
+    Chaque destination porte une version incrémentée à chaque modification,
+    et la collection une révision globale : les ETags en sont dérivés en O(1)
+
+    Deux états : _published, lu sans verrou par tous les lecteurs, et _state, la
+    copie que l'écrivain modifie ; la fin d'une écriture publie _state par une seule
+    affectation. Un lecteur n'attend donc jamais, même pendant un lot de 100 000 lignes
+    Une écriture ne copie que les blocs des index qu'elle touche (quelques milliers de
+    références au plus, quelle que soit la taille de la collection)
+    """
+
+    def __init__(self, destinations=(), next_id=None):
+        self._published = self._state = _Snapshot()
+        self._version_counter = 0
+        # Journal d'annulation, actif uniquement pendant une transaction
+        self._undo = None
+        self._lock = threading.RLock()
+        self._writer = None
+        self._depth = 0
+        # État lu par store.read() en cours sur ce thread
+        self._local = threading.local()
+        # Index ordonnés modifiés par l'écriture en cours, fusionnés avant publication
+        self._dirty = set()
+        # Changements (avant, après) de l'écriture en cours, notifiés après publication
+        self._events = []
+        self._listeners = []
+        self._notifying = threading.RLock()
+        # Identifie cette instance : les versions repartent de 0 au redémarrage
+        self.epoch = uuid.uuid4().hex[:8]
+
+        with self._writing():
+            for destination in destinations:
+                self._insert(dict(destination))
+
+        self.next_id = next_id if next_id is not None else max(self._published.by_id, default=0) + 1
+
+    def __len__(self):
+        return len(self._view().by_id)
+
+    def __iter__(self):
+        return iter(self.all())
+
+    # ── Lectures ──
+
+    def _view(self):
+        """
+        État lu par le thread courant : celui de son store.read() en cours, la copie
+        de travail s'il écrit, sinon le dernier état publié
+        """
+        snapshot = getattr(self._local, 'snapshot', None)
+        if snapshot is not None:
+            return snapshot
+        if self._writer == threading.get_ident():
+            return self._state
+        return self._published
+
+    @property
+    def revision(self):
+        return self._view().revision
+
+    def get(self, id):
+        """Retourne la destination ou None - O(1)"""
+        return self._view().by_id.get(id)
+
+    def find_duplicate(self, name, country, exclude_id=None):
+        """Retourne la destination ayant ce couple (name, country) - O(1)"""
+        state = self._view()
+        existing_id = state.by_key.get(_unique_key(name, country))
+        if existing_id is None or existing_id == exclude_id:
+            return None
+        return state.by_id.get(existing_id)
+
+    def by_country(self, country):
+        """Destinations d'un pays, par id croissant - O(k)"""
+        return self.page(country=country)[0]
+
+    def all(self):
+        return list(self._view().by_id.values())
+
+    def version(self, id):
+        """Version courante de la destination (None si inconnue)"""
+        return self._view().versions.get(id)
+
+    def versions(self, ids):
+        """Versions de plusieurs destinations, dans l'ordre des ids"""
+        versions = self._view().versions
+        return [versions.get(id) for id in ids]
+
+    def read(self, function):
+        """
+        Exécute plusieurs lectures (get, version, page, revision...) sur un même état,
+        sans verrou ni nouvelle tentative : toutes lisent l'état publié au moment de l'appel
+        """
+        local = self._local
+        if getattr(local, 'snapshot', None) is not None:
+            return function()
+        if self._writer == threading.get_ident():
+            # Lecture pendant sa propre écriture : les clés en attente doivent être visibles
+            self._flush_dirty()
+            local.snapshot = self._state
+        else:
+            local.snapshot = self._published
+        try:
+            return function()
+        finally:
+            local.snapshot = None
+
+    def page(self, sort='id', **filters):
+        """Page de destinations lue sur un état cohérent (voir _page)"""
+        return self.read(lambda: self._page(sort, **filters))
+
+    def _page(self, sort='id', country=None, after=None, before=None, limit=None, predicate=None,
+              min_price=None, max_price=None, activity=None, q=None):
+        """
+        Pagination par clé (keyset) sur un index ordonné
+        - after / before : clé de tri (valeur, id) à partir de laquelle reprendre
+        - min_price / max_price : intervalle de prix (inclusif), résolu sur l'index des prix
+        - activity : activité exacte (casse et accents ignorés), via l'index des activités
+        - q : recherche plein texte sur l'index inversé ; sort='relevance' classe
+          par nombre de mots de la requête trouvés
+        - predicate : filtre supplémentaire appliqué aux destinations parcourues
+        Retourne (destinations, has_more) ; seules les clés visitées sont lues,
+        soit O(log n + limit) sans prédicat sélectif
+        """
+        state = self._view()
+        reverse = before is not None
+        scores = self._text_matches(state, activity, q)
+
+        if scores is not None:
+            # Les index texte fournissent directement les k candidats
+            keys = self._candidate_keys(state, scores, sort, country, min_price, max_price, after, before, reverse)
+            return self._collect(state, keys, limit, predicate, reverse)
+
+        indexes = state.by_country.get(country.lower(), {}) if country is not None else state.sorted
+        index = indexes.get(sort)
+        if index is None:
+            return [], False
+
+        price_lower, price_upper = price_bounds(min_price, max_price)
+        has_price_range = price_lower is not None or price_upper is not None
+
+        if sort == 'price_per_day' or not has_price_range:
+            # L'intervalle de prix borne directement le parcours de l'index de tri
+            lower, upper = after, before
+            if sort == 'price_per_day':
+                lower = _tightest(max, lower, price_lower)
+                upper = _tightest(min, upper, price_upper)
+            keys = index.scan(lower, upper, reverse=reverse)
+        else:
+            price_index = indexes['price_per_day']
+            matches = price_index.count(price_lower, price_upper)
+            if self._range_is_cheaper(matches, len(index), limit):
+                # Peu de lignes dans l'intervalle : on les lit sur l'index des prix (O(log n + k))
+                # puis on les ordonne selon le tri demandé (O(k log k))
+                sort_key = SORT_KEYS[sort]
+                shards = state.by_id.shards
+                keys = sorted(
+                    (sort_key(shards[id >> ID_BLOCK_BITS][id]) for _, id in price_index.scan(price_lower, price_upper)),
+                    reverse=reverse
+                )
+                keys = (key for key in keys
+                        if (after is None or key > after) and (before is None or key < before))
+            else:
+                # Intervalle large : parcours de l'index de tri avec filtre sur le prix
+                keys = index.scan(after, before, reverse=reverse)
+                predicate = self._with_price_filter(predicate, min_price, max_price)
+
+        return self._collect(state, keys, limit, predicate, reverse)
+
+    @staticmethod
+    def _collect(state, keys, limit, predicate, reverse):
+        """Lit les destinations des clés parcourues jusqu'à remplir la page"""
+        shards = state.by_id.shards
+        results = []
+        has_more = False
+        for _, id in keys:
+            destination = shards[id >> ID_BLOCK_BITS][id]
+            if predicate is not None and not predicate(destination):
+                continue
+            if limit is not None and len(results) == limit:
+                has_more = True
+                break
+            results.append(destination)
+
+        if reverse:
+            results.reverse()
+        return results, has_more
+
+    sort_key = staticmethod(make_sort_key)
+
+    @staticmethod
+    def _text_matches(state, activity, q):
+        """
+        Candidats des filtres texte : {id: score} ou None sans filtre texte
+        Le score est le nombre de mots distincts de q présents dans la destination
+        Seules les listes d'id des mots demandés sont lues, jamais la collection
+        """
+        if activity is None and not q:
+            return None
+
+        scores = None
+        if q:
+            scores = {}
+            for token in set(tokenize(q)):
+                for id in state.tokens.get(token, ()):
+                    scores[id] = scores.get(id, 0) + 1
+
+        if activity is not None:
+            ids = state.by_activity.get(fold(activity), set())
+            if scores is None:
+                scores = dict.fromkeys(ids, 0)
+            else:
+                scores = {id: score for id, score in scores.items() if id in ids}
+        return scores
+
+    @staticmethod
+    def _candidate_keys(state, scores, sort, country, min_price, max_price, after, before, reverse):
+        """Filtre les candidats (pays, prix, curseur) et les ordonne selon le tri demandé"""
+        country_key = country.lower() if country is not None else None
+        if sort == 'relevance':
+            sort_key = lambda d: (-scores[d['id']], d['id'])
+        else:
+            sort_key = SORT_KEYS[sort]
+
+        shards = state.by_id.shards
+        keys = []
+        for id in scores:
+            destination = shards[id >> ID_BLOCK_BITS][id]
+            price = destination['price_per_day']
+            if country_key is not None and destination['country'].lower() != country_key:
+                continue
+            if (min_price is not None and price < min_price) or (max_price is not None and price > max_price):
+                continue
+            key = sort_key(destination)
+            if (after is not None and key <= after) or (before is not None and key >= before):
+                continue
+            keys.append(key)
+        keys.sort(reverse=reverse)
+        return keys
+
+    @staticmethod
+    def _range_is_cheaper(matches, total, limit):
+        """
+        Choix du plan pour un filtre de prix avec un autre tri :
+        trier les k lignes de l'intervalle coûte ~k log k, alors que parcourir l'index
+        de tri en filtrant visite ~limit * total / k clés avant de remplir la page
+        """
+        if limit is None or matches == 0:
+            return True
+        return matches * max(matches.bit_length(), 1) <= limit * total / matches
+
+    @staticmethod
+    def _with_price_filter(predicate, min_price, max_price):
+        def price_filter(destination):
+            price = destination['price_per_day']
+            if min_price is not None and price < min_price:
+                return False
+            if max_price is not None and price > max_price:
+                return False
+            return predicate is None or predicate(destination)
+        return price_filter
+
+    # ── Écritures ──
+
+    def on_change(self, listener):
+        """
+        Abonne listener(changes) aux écritures publiées : liste des (avant, après) de
+        l'écriture, None pour une création ou une suppression
+        Appelé une fois par écriture (un lot entier à la fois), après publication et hors
+        du verrou d'écriture, dans l'ordre des écritures
+        Les écritures d'une transaction annulée ne sont jamais notifiées
+        """
+        self._listeners.append(listener)
+        return listener
+
+    @contextmanager
+    def _writing(self):
+        """
+        Section d'écriture exclusive (réentrante)
+        L'écrivain modifie une copie de l'état publié ; à la fin de la section, les index
+        ordonnés sont fusionnés puis la copie est publiée en une affectation
+        """
+        events = None
+        try:
+            with self._lock:
+                if not self._depth:
+                    self._state = self._published.fork()
+                    self._writer = threading.get_ident()
+                self._depth += 1
+                try:
+                    yield self
+                finally:
+                    self._depth -= 1
+                    if not self._depth:
+                        self._flush_dirty()
+                        self._published = self._state.freeze()
+                        self._writer = None
+                        events, self._events = self._events, []
+                        if events and self._listeners:
+                            # Pris avant de rendre le verrou d'écriture : les notifications
+                            # restent dans l'ordre des écritures
+                            self._notifying.acquire()
+                        else:
+                            events = None
+        finally:
+            if events:
+                try:
+                    for listener in self._listeners:
+                        listener(events)
+                finally:
+                    self._notifying.release()
+
+    def _flush_dirty(self):
+        """Fusionne les clés en attente (écrivain uniquement, verrou tenu)"""
+        for index in self._dirty:
+            index._flush()
+        self._dirty.clear()
+
+    @contextmanager
+    def batch(self):
+        """
+        Regroupe des écritures indépendantes (import en masse, vérification
+        If-Match suivie de l'écriture) : aucun autre écrivain ne s'intercale et
+        les lecteurs voient le lot entier une fois terminé
+        """
+        with self._writing():
+            yield self
+
+    @contextmanager
+    def transaction(self):
+        """
+        Regroupe plusieurs écritures en tout-ou-rien
+        Chaque écriture enregistre son inverse ; si le bloc lève une exception,
+        le journal est rejoué à l'envers et les versions d'origine sont restaurées
+        """
+        with self._writing():
+            if self._undo is not None:
+                raise RuntimeError("Nested transactions are not supported")
+            self._undo = []
+            mark = len(self._events)
+            try:
+                yield self
+            except BaseException:
+                self._rollback()
+                del self._events[mark:]
+                raise
+            finally:
+                self._undo = None
+
+    def _rollback(self):
+        undo, self._undo = self._undo, None
+        state = self._state
+        for action, destination, version, extra in reversed(undo):
+            id = destination['id']
+            if action == 'create':
+                self._unindex(state.own('by_id').pop(id))
+                state.own('versions').pop(id, None)
+                self.next_id = extra
+            elif action == 'update':
+                self._unindex(state.by_id[id])
+                state.own('by_id')[id] = destination
+                self._index(destination)
+                state.own('versions')[id] = version
+            elif action == 'delete':
+                self._insert(destination)
+                state.own('versions')[id] = version
+        state.revision += 1
+
+    def create(self, data):
+        """
+        Crée une destination et l'indexe
+        Lève DuplicateDestinationError si (name, country) existe déjà
+        """
+        with self._writing():
+            existing = self.find_duplicate(data['name'], data['country'])
+            if existing:
+                raise DuplicateDestinationError(existing)
+
+            destination = {
+                "id": self.next_id,
+                "name": data['name'],
+                "country": data['country'],
+                "price_per_day": data['price_per_day'],
+                "activities": data.get('activities', [])
+            }
+            self._insert(destination)
+            self._log('create', destination, None, self.next_id)
+            self.next_id += 1
+            self._touch(destination['id'])
+            self._events.append((None, destination))
+            return destination
+
+    def update(self, id, changes):
+        """
+        Applique les champs fournis et réindexe la destination
+        Lève KeyError si l'id est inconnu, DuplicateDestinationError en cas de conflit
+        La destination est remplacée par une copie, jamais modifiée en place
+        """
+        with self._writing():
+            state = self._state
+            destination = state.by_id[id]
+            name = changes.get('name', destination['name'])
+            country = changes.get('country', destination['country'])
+
+            existing = self.find_duplicate(name, country, exclude_id=id)
+            if existing:
+                raise DuplicateDestinationError(existing)
+
+            updated = dict(destination)
+            for field in ('name', 'country', 'price_per_day', 'activities'):
+                if field in changes:
+                    updated[field] = changes[field]
+            self._log('update', destination, state.versions[id])
+            self._unindex(destination)
+            state.own('by_id')[id] = updated
+            self._index(updated)
+            self._touch(id)
+            self._events.append((destination, updated))
+            return updated
+
+    def delete(self, id):
+        """Supprime la destination - O(log n). Retourne la destination supprimée ou None"""
+        with self._writing():
+            state = self._state
+            destination = state.by_id.get(id)
+            if destination is not None:
+                del state.own('by_id')[id]
+                self._unindex(destination)
+                self._log('delete', destination, state.own('versions').pop(id, None))
+                state.revision += 1
+                self._events.append((destination, None))
+            return destination
+
+    # ── Maintenance des index ──
+
+    def _log(self, action, destination, version, extra=None):
+        """Enregistre l'inverse d'une écriture si une transaction est ouverte"""
+        if self._undo is not None:
+            self._undo.append((action, destination, version, extra))
+
+    def _touch(self, id):
+        """
+        Attribue une nouvelle version à la destination et fait avancer la révision
+        Le compteur est global : une destination recréée avec le même id
+        ne retrouve jamais une ancienne version (pas de faux 304)
+        """
+        self._version_counter += 1
+        self._state.own('versions')[id] = self._version_counter
+        self._state.revision += 1
+
+    def _insert(self, destination):
+        state = self._state
+        state.own('by_id')[destination['id']] = destination
+        state.own('versions')[destination['id']] = 0
+        self._index(destination)
+
+    def _index(self, destination):
+        state = self._state
+        id = destination['id']
+        state.own('by_key')[_unique_key(destination['name'], destination['country'])] = id
+        sorted_indexes = state.own('sorted')
+        country_indexes = state.own_item(state.own('by_country'), destination['country'].lower(), dict)
+        for field, sort_key in SORT_KEYS.items():
+            key = sort_key(destination)
+            for indexes in (sorted_indexes, country_indexes):
+                index = state.own_item(indexes, field, SortedIndex)
+                index.add(key)
+                self._dirty.add(index)
+        for activity in destination['activities']:
+            state.add_posting('by_activity', fold(activity), id)
+        for token in _searchable_tokens(destination):
+            state.add_posting('tokens', token, id)
+
+    def _unindex(self, destination):
+        state = self._state
+        id = destination['id']
+        state.own('by_key').pop(_unique_key(destination['name'], destination['country']), None)
+        country_key = destination['country'].lower()
+        sorted_indexes = state.own('sorted')
+        by_country = state.own('by_country')
+        country_indexes = state.own_item(by_country, country_key, dict) if country_key in by_country else {}
+        for field, sort_key in SORT_KEYS.items():
+            key = sort_key(destination)
+            state.own_item(sorted_indexes, field, SortedIndex).remove(key)
+            if field in country_indexes:
+                state.own_item(country_indexes, field, SortedIndex).remove(key)
+        if country_indexes and not len(country_indexes['id']):
+            del by_country[country_key]
+        for activity in destination['activities']:
+            state.discard('by_activity', fold(activity), id)
+        for token in _searchable_tokens(destination):
+            state.discard('tokens', token, id)
@@ -0,0 +1,156 @@
+"""
+Test de charge concurrent de l'API REST (sans serveur : client de test Flask)
+64 écrivains en parallèle, pendant que des lecteurs parcourent la collection :
+- créations concurrentes : ids tous distincts, aucune création perdue
+- doublon disputé : un seul écrivain obtient 201, tous les autres 409
+- incréments concurrents d'un même prix via If-Match (412 → on relit et on rejoue) :
+  aucune mise à jour perdue
+- lecteurs : chaque page lue est triée, sans doublon, et son ETag cohérent
+
+Usage : python stress_test.py [memory|sqlite] [écrivains] [opérations_par_écrivain]
+"""
+
+import os
+import sys
+import tempfile
+import threading
+import time
+
+BACKEND = sys.argv[1] if len(sys.argv) > 1 else 'memory'
+WRITERS = int(sys.argv[2]) if len(sys.argv) > 2 else 64
+OPERATIONS = int(sys.argv[3]) if len(sys.argv) > 3 else 20
+READERS = 4
+
+os.environ['REST_STORAGE'] = BACKEND
+# Le test vérifie la cohérence sous concurrence, pas le contrôle d'admission
+os.environ['REST_RATE_LIMIT'] = os.environ['REST_MAX_CONCURRENT'] = '0'
+if BACKEND == 'sqlite':
+    os.environ['REST_SQLITE_PATH'] = os.path.join(tempfile.mkdtemp(), 'stress.db')
+
+from app import app, store  # noqa: E402  (le backend est choisi à l'import)
+
+
+def run_threads(target, count):
+    barrier = threading.Barrier(count)
+    errors = []
+
+    def worker(index):
+        try:
+            barrier.wait()
+            target(index)
+        except Exception as e:
+            errors.append(f"thread {index}: {e!r}")
+
+    threads = [threading.Thread(target=worker, args=(index,)) for index in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return errors
+
+
+def check(condition, message):
+    print(f"   {'✅' if condition else '❌'} {message}")
+    return condition
+
+
+def main():
+    print("=" * 80)
+    print(f"TEST DE CHARGE CONCURRENT - backend {BACKEND}, {WRITERS} écrivains x {OPERATIONS} opérations")
+    print("=" * 80)
+
+    initial_count = len(store)
+    target_id = store.page('id', limit=1)[0][0]['id']
+    initial_price = store.get(target_id)['price_per_day']
+    created_ids = [[] for _ in range(WRITERS)]
+    duplicate_statuses = []
+    retries = []
+    reader_errors = []
+    writers_done = threading.Event()
+
+    def writer(index):
+        client = app.test_client()
+        for i in range(OPERATIONS):
+            response = client.post('/destinations', json={
+                "name": f"Stress {index}-{i}",
+                "country": "Stressland",
+                "price_per_day": i
+            })
+            if response.status_code != 201:
+                raise AssertionError(f"create: {response.status_code}")
+            created_ids[index].append(response.json['data']['id'])
+
+        # Tous les écrivains créent la même destination : un seul doit gagner
+        response = client.post('/destinations', json={"name": "Contested", "country": "Stressland", "price_per_day": 1})
+        duplicate_statuses.append(response.status_code)
+
+        # Lecture-modification-écriture protégée par If-Match
+        for _ in range(OPERATIONS):
+            attempts = 0
+            while True:
+                current = client.get(f'/destinations/{target_id}')
+                price = current.json['data']['price_per_day']
+                response = client.patch(f'/destinations/{target_id}', json={"price_per_day": price + 1},
+                                        headers={'If-Match': current.headers['ETag']})
+                if response.status_code == 200:
+                    break
+                if response.status_code != 412:
+                    raise AssertionError(f"patch: {response.status_code}")
+                attempts += 1
+            retries.append(attempts)
+
+    def reader(index):
+        client = app.test_client()
+        while not writers_done.is_set():
+            url = '/destinations?limit=50&sort=price_per_day&links=relative'
+            seen = set()
+            while url:
+                response = client.get(url)
+                page = response.json
+                # Une page est un instantané : triée et sans doublon
+                # (d'une page à l'autre, une ligne modifiée peut légitimement se déplacer)
+                keys = [(d['price_per_day'], d['id']) for d in page['data']]
+                if keys != sorted(set(keys)):
+                    reader_errors.append(f"reader {index}: incoherent page")
+                seen.update(d['id'] for d in page['data'])
+                next_link = page['_links'].get('next')
+                url = next_link['href'] if next_link else None
+            for id in list(seen)[:20]:
+                response = client.get(f'/destinations/{id}')
+                if response.status_code == 200:
+                    again = client.get(f'/destinations/{id}', headers={'If-None-Match': response.headers['ETag']})
+                    if again.status_code == 200 and again.headers['ETag'] == response.headers['ETag']:
+                        reader_errors.append(f"reader {index}: 200 for an unchanged ETag")
+
+    reader_threads = [threading.Thread(target=reader, args=(index,)) for index in range(READERS)]
+    for thread in reader_threads:
+        thread.start()
+
+    start = time.perf_counter()
+    errors = run_threads(writer, WRITERS)
+    elapsed = time.perf_counter() - start
+    writers_done.set()
+    for thread in reader_threads:
+        thread.join()
+
+    ids = [id for ids in created_ids for id in ids]
+    expected_count = initial_count + WRITERS * OPERATIONS + 1
+    final_price = store.get(target_id)['price_per_day']
+
+    print(f"\n⏱️  {elapsed:.2f} s, {sum(retries)} relectures après 412\n")
+    results = [
+        check(not errors, f"aucune erreur d'écrivain {errors[:3] if errors else ''}"),
+        check(len(ids) == len(set(ids)) == WRITERS * OPERATIONS, f"{len(set(ids))} ids distincts créés"),
+        check(duplicate_statuses.count(201) == 1 and duplicate_statuses.count(409) == WRITERS - 1,
+              f"doublon disputé : {duplicate_statuses.count(201)} x 201, {duplicate_statuses.count(409)} x 409"),
+        check(len(store) == expected_count, f"{len(store)} destinations (attendu {expected_count})"),
+        check(final_price == initial_price + WRITERS * OPERATIONS,
+              f"prix final {final_price} (attendu {initial_price + WRITERS * OPERATIONS}) : aucune mise à jour perdue"),
+        check(not reader_errors, f"lectures cohérentes {reader_errors[:3] if reader_errors else ''}"),
+    ]
+    print()
+    sys.exit(0 if all(results) else 1)
+
+
+if __name__ == '__main__':
+    main()
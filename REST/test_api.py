@@ -146,10 +146,31 @@ response = requests.delete(f"{BASE_URL}/destinations/{new_id}")
 print_response(f"DELETE /destinations/{new_id} (2ème appel)", response)
 
 # ==============================================================================
-# PARTIE 7: Vérification finale
+# PARTIE 7: Pagination par curseur et tri
 # ==============================================================================
 print("\n\n" + "="*80)
-print("PARTIE 7: VÉRIFICATION FINALE")
+print("PARTIE 7: PAGINATION PAR CURSEUR (KEYSET) ET TRI")
+print("="*80)
+
+print("\n📄 GET /destinations?limit=2&sort=price_per_day - Première page")
+response = requests.get(f"{BASE_URL}/destinations", params={"limit": 2, "sort": "price_per_day"})
+print_response("GET /destinations?limit=2&sort=price_per_day", response)
+page_links = response.json()['_links']
+
+if 'next' in page_links:
+    print("\n📄 Suivre le lien next (curseur opaque)")
+    response = requests.get(page_links['next']['href'])
+    print_response("GET /destinations (page suivante)", response)
+
+    print("\n   → Même page avec If-None-Match : 304 tant que ses lignes ne changent pas")
+    response = requests.get(page_links['next']['href'], headers={'If-None-Match': response.headers.get('ETag')})
+    print_response("GET /destinations (page suivante, If-None-Match)", response)
+
+# ==============================================================================
+# PARTIE 8: Vérification finale
+# ==============================================================================
+print("\n\n" + "="*80)
+print("PARTIE 8: VÉRIFICATION FINALE")
 print("="*80)
 
 print("\n1️⃣3️⃣  GET /destinations - État final")
@@ -169,6 +190,7 @@ print("   ✅ Header Location : 201 Created avec URI de la ressource")
 print("   ✅ Idempotence : PUT et DELETE testés plusieurs fois")
 print("   ✅ Code 204 : No Content pour DELETE réussi")
 print("   ✅ Code 409 : Conflict pour détection de doublon")
+print("   ✅ Pagination par curseur : liens next/prev + ETag par page")
 print("   ✅ Méthodes HTTP : GET, POST, PUT, PATCH, DELETE")
 print("\n🎓 Modèle de maturité de Richardson:")
 print("   • Niveau 0 ❌ : RPC sur HTTP (tunneling)")
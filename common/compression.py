@@ -0,0 +1,154 @@
+"""
+Compression négociée des réponses (Accept-Encoding), partagée par les services REST et GraphQL
+- gzip et deflate, brotli si le module est installé
+- seuil minimal : les petits corps partent tels quels (la compression coûterait plus qu'elle ne gagne)
+- cache des corps compressés par ETag : une collection inchangée n'est compressée qu'une fois
+- réponses en streaming (export NDJSON) : compression à la volée, bloc par bloc
+"""
+
+import gzip
+import threading
+import zlib
+from collections import OrderedDict
+
+try:
+    import brotli
+except ImportError:  # brotli est optionnel
+    brotli = None
+
+# Taille minimale (octets) d'un corps à compresser
+MIN_SIZE = 1024
+# Budget mémoire du cache des corps compressés (octets)
+CACHE_MAX_BYTES = 32 * 1024 * 1024
+
+COMPRESSIBLE_MIMETYPES = ('application/json', 'application/x-ndjson', 'text/')
+# Flux d'événements : chaque message doit partir immédiatement, sans tampon de compression
+UNCOMPRESSED_MIMETYPES = ('text/event-stream',)
+
+ENCODERS = {
+    'gzip': lambda body: gzip.compress(body, compresslevel=6, mtime=0),
+    'deflate': lambda body: zlib.compress(body, 6),
+}
+if brotli is not None:
+    ENCODERS['br'] = lambda body: brotli.compress(body, quality=5)
+
+# Ordre de préférence à qualité égale côté client
+PREFERRED_ENCODINGS = tuple(encoding for encoding in ('br', 'gzip', 'deflate') if encoding in ENCODERS)
+
+# Compression en flux : paramètre wbits de zlib (31 : en-tête gzip, 15 : en-tête zlib)
+STREAM_WBITS = {'gzip': 31, 'deflate': 15}
+
+
+class CompressedBodyCache:
+    """
+    LRU des corps compressés, borné en octets
+    Clé : (encodage, ETag, URL) - un ETag n'identifie une représentation que pour une URL
+    donnée (filtres, hôte des liens absolus)
+    """
+
+    def __init__(self, max_bytes=CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            body = self._entries.get(key)
+            if body is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return body
+
+    def put(self, key, body):
+        if len(body) > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.size -= len(previous)
+            self._entries[key] = body
+            self.size += len(body)
+            while self.size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.size -= len(evicted)
+                self.evictions += 1
+
+    def stats(self):
+        return {
+            "entries": len(self._entries),
+            "bytes": self.size,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions
+        }
+
+
+def negotiate(accept_encodings, encodings=PREFERRED_ENCODINGS):
+    """Meilleur encodage accepté par le client (None : pas de compression)"""
+    return accept_encodings.best_match(encodings)
+
+
+def compress_stream(chunks, encoding):
+    """
+    Compresse un corps produit par morceaux sans l'accumuler
+    Chaque morceau est vidé (Z_SYNC_FLUSH) : le client le reçoit et le décode aussitôt
+    """
+    compressor = zlib.compressobj(6, zlib.DEFLATED, STREAM_WBITS[encoding])
+    for chunk in chunks:
+        if isinstance(chunk, str):
+            chunk = chunk.encode()
+        data = compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def init_compression(app, cache=None, min_size=MIN_SIZE):
+    """
+    Installe la compression sur une application Flask (after_request)
+    Retourne le cache des corps compressés (None : pas de cache)
+    """
+    from flask import request
+
+    @app.after_request
+    def compress_response(response):
+        if response.status_code != 200 or response.direct_passthrough:
+            return response
+        if not response.mimetype.startswith(COMPRESSIBLE_MIMETYPES) \
+                or response.mimetype.startswith(UNCOMPRESSED_MIMETYPES):
+            return response
+        response.vary.add('Accept-Encoding')
+        if response.is_streamed:
+            encoding = negotiate(request.accept_encodings, tuple(STREAM_WBITS))
+            if encoding is not None and 'Content-Encoding' not in response.headers:
+                response.response = compress_stream(response.response, encoding)
+                response.headers['Content-Encoding'] = encoding
+            return response
+        if 'Content-Encoding' in response.headers or response.content_length is None \
+                or response.content_length < min_size:
+            return response
+
+        encoding = negotiate(request.accept_encodings)
+        if encoding is None:
+            return response
+
+        etag = response.headers.get('ETag')
+        key = (encoding, etag, request.url) if cache is not None and etag else None
+        body = cache.get(key) if key else None
+        if body is None:
+            body = ENCODERS[encoding](response.get_data())
+            if key:
+                cache.put(key, body)
+
+        response.set_data(body)
+        response.headers['Content-Encoding'] = encoding
+        return response
+
+    return cache
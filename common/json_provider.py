@@ -0,0 +1,104 @@
+"""
+Sérialisation JSON rapide pour Flask (app.json, jsonify), partagée par les services
+REST et GraphQL
+- orjson ou ujson s'ils sont installés, json (stdlib) sinon
+- même forme de sortie quel que soit le backend : clés triées, séparateurs compacts,
+  UTF-8 non échappé. Seule l'écriture des flottants peut différer : exposant sans « + »
+  ni zéro de tête (1e16, 1.5e-7 au lieu de 1e+16, 1.5e-07) avec orjson et ujson, NaN
+  et Infinity écrits null par orjson ; les valeurs relues sont les mêmes (hors NaN/Infinity)
+- types que seul Flask sait sérialiser (dates HTTP, Decimal, dataclasses...) : même
+  fonction default que le fournisseur par défaut
+- en cas d'échec du backend rapide (entier de plus de 64 bits...), repli sur la stdlib
+
+Le backend peut être imposé : JSON_BACKEND=json|ujson|orjson
+"""
+
+import json
+import os
+
+from flask.json.provider import DefaultJSONProvider, _default
+
+try:
+    import orjson
+except ImportError:  # orjson est optionnel
+    orjson = None
+
+try:
+    import ujson
+except ImportError:  # ujson est optionnel
+    ujson = None
+
+
+def _dumps_stdlib(obj, indent=None):
+    separators = None if indent else (',', ':')
+    return json.dumps(obj, default=_default, ensure_ascii=False, sort_keys=True,
+                      indent=indent, separators=separators).encode()
+
+
+def _dumps_orjson(obj, indent=None):
+    if indent not in (None, 2):
+        return _dumps_stdlib(obj, indent)
+    option = ORJSON_OPTIONS | orjson.OPT_INDENT_2 if indent else ORJSON_OPTIONS
+    try:
+        return orjson.dumps(obj, default=_default, option=option)
+    except TypeError:
+        return _dumps_stdlib(obj, indent)
+
+
+# ujson sérialise lui-même Decimal (nombre) et les dataclasses (objet vide) sans passer par
+# default : rendu différent de Flask pour ces types, absents des réponses de nos services
+def _dumps_ujson(obj, indent=None):
+    if indent:
+        return _dumps_stdlib(obj, indent)
+    try:
+        return ujson.dumps(obj, default=_default, ensure_ascii=False, sort_keys=True,
+                           escape_forward_slashes=False).encode()
+    except (TypeError, OverflowError):
+        return _dumps_stdlib(obj)
+
+
+# Backends disponibles, du plus rapide au plus lent : dumps(obj, indent) -> bytes, loads
+BACKENDS = {'json': (_dumps_stdlib, json.loads)}
+if ujson is not None:
+    BACKENDS['ujson'] = (_dumps_ujson, json.loads)
+if orjson is not None:
+    # Dates et dataclasses confiées à default : même rendu que Flask (date HTTP...)
+    ORJSON_OPTIONS = (orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+                      | orjson.OPT_PASSTHROUGH_DATACLASS | orjson.OPT_PASSTHROUGH_SUBCLASS)
+    BACKENDS['orjson'] = (_dumps_orjson, orjson.loads)
+
+DEFAULT_BACKEND = os.environ.get('JSON_BACKEND') or next(
+    name for name in ('orjson', 'ujson', 'json') if name in BACKENDS)
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """
+    Fournisseur JSON de Flask adossé au backend le plus rapide disponible
+    Installation : app.json = FastJSONProvider(app)
+    """
+
+    ensure_ascii = False
+    sort_keys = True
+
+    def __init__(self, app, backend=DEFAULT_BACKEND):
+        super().__init__(app)
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown JSON backend: {backend!r} (available: {', '.join(BACKENDS)})")
+        self.backend = backend
+        self._dumps, self._loads = BACKENDS[backend]
+
+    def dumps(self, obj, **kwargs):
+        # Options explicites (cls, separators...) : comportement de la stdlib
+        if kwargs:
+            return super().dumps(obj, **kwargs)
+        return self._dumps(obj).decode()
+
+    def loads(self, s, **kwargs):
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return self._loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = 2 if (self.compact is None and self._app.debug) or self.compact is False else None
+        return self._app.response_class(self._dumps(obj, indent) + b"\n", mimetype=self.mimetype)
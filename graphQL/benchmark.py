@@ -0,0 +1,91 @@
+"""
+Benchmark du pipeline GraphQL : temps CPU par requête
+graphql (analyse + validation + exécution à chaque appel) comparé au cache
+de documents (exécution seule une fois le document en cache), avec les chargeurs du serveur
+
+Usage : python benchmark.py [itérations]    (défaut : 2000)
+"""
+
+import contextlib
+import io
+import sys
+import time
+
+from graphql import execute, graphql, parse, validate
+
+from dataloaders import RequestContext, run_sync
+from document_cache import DocumentCache
+
+with contextlib.redirect_stdout(io.StringIO()):
+    from server import BATCH_LOADERS, graphql_schema
+
+QUERIES = {
+    "destination (1 champ)": "{ destination(id: 1) { name } }",
+    "destinations filtrées": """
+        query Budget($country: String, $max: Float) {
+            destinations(country: $country, maxPrice: $max) { id name country pricePerDay activities }
+        }
+    """,
+    "tableau de bord (alias + fragment)": """
+        query Dashboard {
+            paris: destination(id: 1) { ...Card }
+            tokyo: destination(id: 2) { ...Card }
+            newYork: destination(id: 3) { ...Card }
+            cheap: destinations(maxPrice: 160) { ...Card activities }
+            spain: destinations(country: "Spain") { ...Card }
+        }
+        fragment Card on Destination { id name country pricePerDay }
+    """,
+}
+VARIABLES = {"country": "France", "max": 200}
+
+
+def cpu_time(function, iterations):
+    """Temps CPU moyen d'un appel, en microsecondes (sorties des résolveurs ignorées)"""
+    with contextlib.redirect_stdout(io.StringIO()) as output:
+        function()
+        start = time.process_time()
+        for _ in range(iterations):
+            function()
+            output.seek(0)
+            output.truncate()
+        return (time.process_time() - start) / iterations * 1e6
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    print("=" * 100)
+    print(f"BENCHMARK DU CACHE DE DOCUMENTS GRAPHQL - {iterations} itérations, temps CPU par requête")
+    print("=" * 100)
+
+    for title, query in QUERIES.items():
+        cache = DocumentCache(graphql_schema)
+        document = parse(query)
+
+        def uncached():
+            return run_sync(graphql(graphql_schema, query, variable_values=VARIABLES,
+                                    context_value=RequestContext(BATCH_LOADERS)))
+
+        def cached():
+            cached_document, _ = cache.get(query)
+            return run_sync(execute(graphql_schema, cached_document, variable_values=VARIABLES,
+                                    context_value=RequestContext(BATCH_LOADERS)))
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            assert uncached().data == cached().data
+        parse_time = cpu_time(lambda: parse(query), iterations)
+        validate_time = cpu_time(lambda: validate(graphql_schema, document), iterations)
+        before = cpu_time(uncached, iterations)
+        after = cpu_time(cached, iterations)
+
+        print(f"\n  {title}")
+        print(f"    analyse (parse)        {parse_time:8.1f} µs")
+        print(f"    validation (validate)  {validate_time:8.1f} µs")
+        print(f"    graphql                {before:8.1f} µs")
+        print(f"    cache + execute        {after:8.1f} µs   "
+              f"économie : {before - after:7.1f} µs par requête ({(before - after) / before:.0%})")
+    print()
+
+
+if __name__ == '__main__':
+    main()
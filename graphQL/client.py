@@ -5,6 +5,7 @@ Illustre la sélection flexible de champs et les mutations
 """
 
 import requests
+import hashlib
 import json
 from datetime import datetime
 
@@ -50,6 +51,69 @@ class TravelPlannerClient:
             print(f"Erreur lors de l'appel GraphQL: {e}")
             return None
     
+    def execute_persisted_query(self, query, variables=None):
+        """
+        Exécute une requête persistée (APQ) : seule l'empreinte SHA-256 est envoyée
+        Si le serveur ne la connaît pas (PersistedQueryNotFound), la requête est renvoyée
+        avec son texte pour l'enregistrer
+        
+        Args:
+            query: Requête GraphQL (string)
+            variables: Variables GraphQL optionnelles (dict)
+        
+        Returns:
+            Réponse JSON de l'API
+        """
+        extensions = {
+            'persistedQuery': {
+                'version': 1,
+                'sha256Hash': hashlib.sha256(query.encode()).hexdigest()
+            }
+        }
+        payload = {'extensions': extensions}
+        if variables:
+            payload['variables'] = variables
+        
+        try:
+            response = requests.post(self.graphql_url, json=payload).json()
+            errors = response.get('errors') or []
+            if any(error.get('message') == 'PersistedQueryNotFound' for error in errors):
+                payload['query'] = query
+                response = requests.post(self.graphql_url, json=payload).json()
+            return response
+        except Exception as e:
+            print(f"Erreur lors de l'appel GraphQL: {e}")
+            return None
+
+    def execute_batch(self, operations):
+        """
+        Exécute plusieurs opérations en une seule requête HTTP
+        Les lectures sont exécutées ensemble, les mutations dans l'ordre du lot
+
+        Args:
+            operations: Liste de requêtes (string) ou de tuples (requête, variables)
+
+        Returns:
+            Liste des réponses JSON, dans l'ordre des opérations
+            (chaque réponse porte ses propres erreurs)
+        """
+        payload = []
+        for operation in operations:
+            query, variables = (operation, None) if isinstance(operation, str) else operation
+            payload.append({'query': query, 'variables': variables} if variables else {'query': query})
+
+        try:
+            response = requests.post(
+                self.graphql_url,
+                json=payload,
+                headers={'Content-Type': 'application/json'}
+            ).json()
+            # Lot refusé (taille) : une seule réponse d'erreur, répétée pour chaque opération
+            return response if isinstance(response, list) else [response] * len(operations)
+        except Exception as e:
+            print(f"Erreur lors de l'appel GraphQL: {e}")
+            return None
+
     def pretty_print_response(self, response, title="GraphQL Response"):
         """Affiche une réponse GraphQL de manière lisible"""
         print(f"\n{'='*70}")
@@ -0,0 +1,74 @@
+"""
+Cache des documents GraphQL analysés et validés
+graphql_sync analyse (parse) puis valide (validate) le texte de la requête à chaque appel ;
+les clients envoient pourtant toujours les mêmes opérations. Le cache conserve le
+DocumentNode validé, indexé par le texte de la requête :
+- hit : ni analyse ni validation, exécution directe (execute)
+- LRU borné en nombre de documents
+- seuls les documents valides sont conservés (une requête invalide est réanalysée)
+- rules : règles de validation ajoutées aux règles standard (profondeur, alias...),
+  vérifiées une seule fois par document
+"""
+
+import threading
+from collections import OrderedDict
+
+from graphql import GraphQLError, parse, specified_rules, validate
+
+# Nombre de documents conservés
+DOCUMENT_CACHE_SIZE = 1000
+
+
+class DocumentCache:
+    def __init__(self, schema, max_entries=DOCUMENT_CACHE_SIZE, rules=()):
+        self.schema = schema
+        self.rules = (*specified_rules, *rules)
+        self.max_entries = max_entries
+        self._documents = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._documents)
+
+    def get(self, query):
+        """
+        Document validé pour ce texte de requête : (document, None) ou (None, erreurs)
+        Les erreurs sont celles de l'analyse ou de la validation (GraphQLError)
+        """
+        with self._lock:
+            document = self._documents.get(query)
+            if document is not None:
+                self._documents.move_to_end(query)
+                self.hits += 1
+                return document, None
+            self.misses += 1
+
+        try:
+            document = parse(query)
+        except GraphQLError as error:
+            return None, [error]
+        errors = validate(self.schema, document, self.rules)
+        if errors:
+            return None, errors
+
+        with self._lock:
+            self._documents[query] = document
+            self._documents.move_to_end(query)
+            while len(self._documents) > self.max_entries:
+                self._documents.popitem(last=False)
+                self.evictions += 1
+        return document, None
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._documents),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else None
+        }
@@ -0,0 +1,153 @@
+"""
+Requêtes persistées automatiques (APQ, protocole persistedQuery d'Apollo)
+Le client envoie l'empreinte SHA-256 de sa requête au lieu du texte :
+    {"extensions": {"persistedQuery": {"version": 1, "sha256Hash": "..."}}}
+- empreinte connue : le document déjà validé est exécuté directement
+- empreinte inconnue : erreur PersistedQueryNotFound, le client renvoie alors la requête
+  avec son texte et l'empreinte, ce qui l'enregistre
+- magasin borné (LRU) ; en mode liste blanche, seuls les documents chargés au démarrage
+  sont exécutables et aucun enregistrement n'est accepté
+"""
+
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+
+from graphql import GraphQLError
+
+# Nombre de documents enregistrés conservés
+PERSISTED_QUERIES_SIZE = 1000
+
+PERSISTED_QUERY_VERSION = 1
+
+
+def query_hash(query):
+    return hashlib.sha256(query.encode()).hexdigest()
+
+
+class PersistedQueryNotFound(GraphQLError):
+    def __init__(self):
+        super().__init__("PersistedQueryNotFound", extensions={"code": "PERSISTED_QUERY_NOT_FOUND"})
+
+
+class PersistedQueryNotAllowed(GraphQLError):
+    def __init__(self):
+        super().__init__("PersistedQueryNotAllowed: only allow-listed documents can be executed",
+                         extensions={"code": "PERSISTED_QUERY_NOT_ALLOWED"})
+
+
+class PersistedQueryStore:
+    """
+    Empreinte SHA-256 → document validé (fourni par le cache de documents)
+    Les documents de la liste blanche ne sont jamais évincés
+    """
+
+    def __init__(self, document_cache, max_entries=PERSISTED_QUERIES_SIZE):
+        self.document_cache = document_cache
+        self.max_entries = max_entries
+        self.allowlist = None
+        self._documents = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.registrations = 0
+        self.rejected = 0
+
+    def load_allowlist(self, path):
+        """
+        Active le mode liste blanche à partir d'un fichier JSON : liste de requêtes,
+        ou objet {empreinte: requête} (chaque empreinte est vérifiée)
+        Un document invalide arrête le démarrage (ValueError)
+        """
+        with open(path, encoding='utf-8') as file:
+            entries = json.load(file)
+        if isinstance(entries, list):
+            entries = {query_hash(query): query for query in entries}
+        allowlist = {}
+        for sha256, query in entries.items():
+            if query_hash(query) != sha256:
+                raise ValueError(f"Allow-list entry {sha256}: hash does not match the query")
+            document, errors = self.document_cache.get(query)
+            if errors:
+                raise ValueError(f"Allow-list entry {sha256}: {errors[0].message}")
+            allowlist[sha256] = document
+        self.allowlist = allowlist
+        return len(allowlist)
+
+    def lookup(self, sha256):
+        """Document enregistré pour cette empreinte, ou None"""
+        with self._lock:
+            document = self.allowlist.get(sha256) if self.allowlist is not None else self._documents.get(sha256)
+            if document is None:
+                self.misses += 1
+                return None
+            if self.allowlist is None:
+                self._documents.move_to_end(sha256)
+            self.hits += 1
+            return document
+
+    def register(self, sha256, query):
+        """
+        Enregistre une requête sous son empreinte : (document, None) ou (None, erreurs)
+        Seul un document valide dont l'empreinte correspond est enregistré
+        """
+        if self.allowlist is not None:
+            document = self.lookup(sha256) if query_hash(query) == sha256 else None
+            if document is None:
+                self.rejected += 1
+                return None, [PersistedQueryNotAllowed()]
+            return document, None
+        if query_hash(query) != sha256:
+            self.rejected += 1
+            return None, [GraphQLError("provided sha does not match query",
+                                       extensions={"code": "PERSISTED_QUERY_HASH_MISMATCH"})]
+        document, errors = self.document_cache.get(query)
+        if errors:
+            return None, errors
+        with self._lock:
+            if sha256 not in self._documents:
+                self.registrations += 1
+            self._documents[sha256] = document
+            self._documents.move_to_end(sha256)
+            while len(self._documents) > self.max_entries:
+                self._documents.popitem(last=False)
+        return document, None
+
+    def resolve(self, query, extension):
+        """
+        Document à exécuter pour une requête : (document, None) ou (None, erreurs)
+        extension : contenu de extensions.persistedQuery (None sans APQ)
+        """
+        if extension is None:
+            if self.allowlist is None:
+                return self.document_cache.get(query)
+            # Liste blanche : le texte complet n'est accepté que s'il y figure
+            document = self.lookup(query_hash(query))
+            if document is None:
+                self.rejected += 1
+                return None, [PersistedQueryNotAllowed()]
+            return document, None
+
+        if not isinstance(extension, dict) or extension.get('version') != PERSISTED_QUERY_VERSION \
+                or not isinstance(extension.get('sha256Hash'), str):
+            return None, [GraphQLError("Unsupported persisted query (version 1 with sha256Hash expected)",
+                                       extensions={"code": "PERSISTED_QUERY_NOT_SUPPORTED"})]
+        sha256 = extension['sha256Hash']
+        if query:
+            return self.register(sha256, query)
+        document = self.lookup(sha256)
+        if document is None:
+            return None, [PersistedQueryNotAllowed() if self.allowlist is not None else PersistedQueryNotFound()]
+        return document, None
+
+    def stats(self):
+        return {
+            "mode": "allowlist" if self.allowlist is not None else "automatic",
+            "entries": len(self.allowlist if self.allowlist is not None else self._documents),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "registrations": self.registrations,
+            "rejected": self.rejected
+        }
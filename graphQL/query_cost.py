@@ -0,0 +1,163 @@
+"""
+Analyse statique du coût des requêtes GraphQL, avant toute exécution
+- profondeur maximale et nombre maximal d'alias : règles de validation (vérifiées une seule
+  fois par document, le résultat est conservé avec le document en cache)
+- coût estimé : coût propre de chaque champ, multiplié pour une liste par le nombre
+  d'éléments attendu (estimé à partir des arguments : filtres de prix, pays...)
+  Le coût dépend des variables : il est calculé à chaque requête, sur le document déjà
+  validé (simple parcours de l'AST, sans accès aux données)
+"""
+
+from graphql import (FieldNode, FragmentSpreadNode, GraphQLError, InlineFragmentNode, OperationType,
+                     ValidationRule, get_named_type, get_nullable_type, is_list_type, is_object_type)
+from graphql.execution.values import get_argument_values, get_variable_values
+from graphql.utilities import get_operation_ast
+
+# Limites par défaut
+MAX_QUERY_COST = 1000
+MAX_QUERY_DEPTH = 10
+MAX_QUERY_ALIASES = 30
+
+# Coût d'un champ objet sans coût propre, d'un champ de mutation, et taille supposée
+# d'une liste sans estimateur
+DEFAULT_FIELD_COST = 1
+MUTATION_FIELD_COST = 10
+DEFAULT_LIST_SIZE = 10
+
+
+def max_depth_rule(max_depth):
+    """Règle de validation : profondeur de sélection (fragments compris) au plus max_depth"""
+
+    class MaxDepthRule(ValidationRule):
+        def enter_operation_definition(self, node, *_args):
+            depth = self._depth(node.selection_set, set())
+            if depth > max_depth:
+                name = node.name.value if node.name else "anonymous"
+                self.report_error(GraphQLError(
+                    f"Operation '{name}' is {depth} levels deep (maximum {max_depth})",
+                    node, extensions={"code": "QUERY_TOO_DEEP", "depth": depth, "maximum": max_depth}))
+
+        def _depth(self, selection_set, fragments):
+            if selection_set is None:
+                return 0
+            depth = 0
+            for selection in selection_set.selections:
+                if isinstance(selection, FieldNode):
+                    depth = max(depth, 1 + self._depth(selection.selection_set, fragments))
+                elif isinstance(selection, InlineFragmentNode):
+                    depth = max(depth, self._depth(selection.selection_set, fragments))
+                elif isinstance(selection, FragmentSpreadNode) and selection.name.value not in fragments:
+                    # Les cycles de fragments sont signalés par la règle standard : on ne les suit pas
+                    fragment = self.context.get_fragment(selection.name.value)
+                    if fragment is not None:
+                        depth = max(depth, self._depth(fragment.selection_set, fragments | {selection.name.value}))
+            return depth
+
+    return MaxDepthRule
+
+
+def max_aliases_rule(max_aliases):
+    """Règle de validation : nombre d'alias du document au plus max_aliases"""
+
+    class MaxAliasesRule(ValidationRule):
+        def __init__(self, context):
+            super().__init__(context)
+            self.aliases = 0
+
+        def enter_field(self, node, *_args):
+            if node.alias is not None:
+                self.aliases += 1
+
+        def leave_document(self, node, *_args):
+            if self.aliases > max_aliases:
+                self.report_error(GraphQLError(
+                    f"Document uses {self.aliases} aliases (maximum {max_aliases})",
+                    node, extensions={"code": "TOO_MANY_ALIASES", "aliases": self.aliases, "maximum": max_aliases}))
+
+    return MaxAliasesRule
+
+
+class QueryCostAnalyzer:
+    """
+    Coût d'une opération = somme des coûts de ses champs
+    - field_costs : coût propre par champ, clé 'Type.champ' (champs scalaires : 0)
+    - list_sizes : estimateur du nombre d'éléments d'une liste, clé 'Type.champ',
+      appelé avec les arguments du champ (variables résolues)
+    Un élément de liste coûte au moins 1 : demander une liste n'est jamais gratuit
+    """
+
+    def __init__(self, schema, field_costs=None, list_sizes=None, max_cost=MAX_QUERY_COST):
+        self.schema = schema
+        self.field_costs = field_costs or {}
+        self.list_sizes = list_sizes or {}
+        self.max_cost = max_cost
+
+    def cost(self, document, operation_name=None, variables=None):
+        """Coût estimé de l'opération (0 si elle est introuvable ou ses variables invalides)"""
+        operation = get_operation_ast(document, operation_name)
+        if operation is None:
+            return 0
+        root_type = self.schema.get_root_type(operation.operation)
+        coerced = get_variable_values(self.schema, operation.variable_definitions or (), variables or {})
+        if isinstance(coerced, list):
+            return 0  # variables invalides : l'exécution renverra les erreurs
+        fragments = {definition.name.value: definition for definition in document.definitions
+                     if getattr(definition, 'kind', None) == 'fragment_definition'}
+        mutation = operation.operation == OperationType.MUTATION
+        return self._selection_cost(root_type, operation.selection_set, fragments, coerced, mutation)
+
+    def check(self, document, operation_name=None, variables=None):
+        """(coût, None) ou (coût, erreur) si le budget est dépassé"""
+        cost = self.cost(document, operation_name, variables)
+        if cost > self.max_cost:
+            return cost, GraphQLError(
+                f"Query cost {cost} exceeds the maximum of {self.max_cost}",
+                extensions={"code": "QUERY_TOO_COMPLEX", "cost": cost, "maximum": self.max_cost})
+        return cost, None
+
+    def _selection_cost(self, parent_type, selection_set, fragments, variables, root_mutation=False):
+        cost = 0
+        for selection in selection_set.selections:
+            if isinstance(selection, FieldNode):
+                cost += self._field_cost(parent_type, selection, fragments, variables, root_mutation)
+            elif isinstance(selection, InlineFragmentNode):
+                fragment_type = (self.schema.get_type(selection.type_condition.name.value)
+                                 if selection.type_condition else parent_type)
+                cost += self._selection_cost(fragment_type, selection.selection_set, fragments, variables)
+            elif isinstance(selection, FragmentSpreadNode):
+                fragment = fragments.get(selection.name.value)
+                if fragment is not None:
+                    fragment_type = self.schema.get_type(fragment.type_condition.name.value)
+                    cost += self._selection_cost(fragment_type, fragment.selection_set,
+                                                 {name: f for name, f in fragments.items() if f is not fragment},
+                                                 variables)
+        return cost
+
+    def _field_cost(self, parent_type, node, fragments, variables, root_mutation):
+        name = node.name.value
+        if name.startswith('__') or not is_object_type(parent_type) or name not in parent_type.fields:
+            return 0
+        field = parent_type.fields[name]
+        coordinate = f"{parent_type.name}.{name}"
+        field_type = get_nullable_type(field.type)
+        named_type = get_named_type(field_type)
+
+        if coordinate in self.field_costs:
+            own = self.field_costs[coordinate]
+        elif root_mutation:
+            own = MUTATION_FIELD_COST
+        else:
+            own = DEFAULT_FIELD_COST if node.selection_set is not None else 0
+
+        item = 0
+        if node.selection_set is not None and is_object_type(named_type):
+            item = self._selection_cost(named_type, node.selection_set, fragments, variables)
+        if not is_list_type(field_type):
+            return own + item
+
+        estimate = self.list_sizes.get(coordinate)
+        if estimate is None:
+            size = DEFAULT_LIST_SIZE
+        else:
+            size = estimate(**get_argument_values(field, node, variables))
+        return own + size * max(item, 1) if node.selection_set is not None else own
@@ -8,13 +8,34 @@ from flask import Flask, request, jsonify, Response
 from flask_cors import CORS
 import graphene
 from graphene import Schema, ObjectType, String, Int, Float, List, Field
-from graphql import graphql_sync
-import json
+from graphql import ExecutionResult, GraphQLError, OperationType, execute, get_operation_ast
+import bisect
+import os
 import queue
+import sys
 import threading
 
+# Modules partagés avec le service REST (json_provider, compression)
+COMMON_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'common')
+if COMMON_DIR not in sys.path:
+    sys.path.append(COMMON_DIR)
+
+from compression import init_compression
+from dataloaders import RequestContext, run_all, run_sync
+from document_cache import DocumentCache
+from json_provider import FastJSONProvider
+from persisted_queries import PersistedQueryNotFound, PersistedQueryStore
+from query_cost import (MAX_QUERY_ALIASES, MAX_QUERY_COST, MAX_QUERY_DEPTH, QueryCostAnalyzer,
+                        max_aliases_rule, max_depth_rule)
+
 app = Flask(__name__)
 CORS(app)
+# Sérialisation JSON via orjson / ujson si disponibles (mêmes valeurs que la stdlib, format des flottants près)
+app.json = FastJSONProvider(app)
+
+# Compression négociée via Accept-Encoding (module partagé avec REST) ; le flux SSE
+# n'est pas concerné : chaque événement doit partir immédiatement
+init_compression(app)
 
 # ── File d'attente pour les abonnés SSE (simulation subscription) ──
 _subscribers = []
@@ -80,6 +101,64 @@ DESTINATIONS_DB = [
 
 next_id = 5
 
+# ── Index des prix : listes triées de (prix, id), globale (clé None) et par pays ──
+# Les filtres min_price / max_price sont résolus par bisect en O(log n + k)
+DESTINATIONS_BY_ID = {}
+PRICE_INDEX = {None: []}
+
+def _price_index_keys(destination):
+    return (None, destination['country'].lower())
+
+def index_destination(destination):
+    """Ajoute une destination aux index (à appeler après chaque écriture)"""
+    DESTINATIONS_BY_ID[destination['id']] = destination
+    key = (destination['price_per_day'], destination['id'])
+    for country in _price_index_keys(destination):
+        bisect.insort(PRICE_INDEX.setdefault(country, []), key)
+
+def unindex_destination(destination):
+    """Retire une destination des index (à appeler avant modification ou suppression)"""
+    DESTINATIONS_BY_ID.pop(destination['id'], None)
+    key = (destination['price_per_day'], destination['id'])
+    for country in _price_index_keys(destination):
+        keys = PRICE_INDEX.get(country, [])
+        position = bisect.bisect_left(keys, key)
+        if position < len(keys) and keys[position] == key:
+            del keys[position]
+
+def _price_range(country, min_price, max_price):
+    """Clés de l'index du pays et bornes [start, stop) de l'intervalle de prix"""
+    keys = PRICE_INDEX.get(country.lower() if country else None, [])
+    start = 0 if min_price is None else bisect.bisect_left(keys, (min_price, float('-inf')))
+    stop = len(keys) if max_price is None else bisect.bisect_right(keys, (max_price, float('inf')))
+    return keys, start, max(start, stop)
+
+def find_by_price(country=None, min_price=None, max_price=None):
+    """
+    Destinations (d'un pays si fourni) dont le prix est dans [min_price, max_price]
+    Seules les lignes de l'intervalle sont lues, puis remises dans l'ordre des id
+    """
+    keys, start, stop = _price_range(country, min_price, max_price)
+    return [DESTINATIONS_BY_ID[id] for id in sorted(id for _, id in keys[start:stop])]
+
+def count_by_price(country=None, min_price=None, max_price=None):
+    """Nombre de destinations que renverrait find_by_price, sans les lire (deux bisect)"""
+    _, start, stop = _price_range(country, min_price, max_price)
+    return stop - start
+
+for _destination in DESTINATIONS_DB:
+    index_destination(_destination)
+
+def batch_load_destinations(ids):
+    """Chargement groupé : toutes les destinations demandées pendant un tour d'exécution"""
+    print(f"GraphQL Batch: destinations(ids: {list(ids)})")
+    return [DESTINATIONS_BY_ID.get(id) for id in ids]
+
+# Fonctions de chargement groupé disponibles pour les résolveurs (info.context.loaders[nom])
+BATCH_LOADERS = {
+    "destination": batch_load_destinations,
+}
+
 # Requetes GraphQL (Lectures)
 
 class Query(ObjectType):
@@ -92,32 +171,28 @@ class Query(ObjectType):
     destinations = List(
         Destination,
         country=String(),
+        min_price=Float(),
         max_price=Float()
     )
     
-    def resolve_destination(self, info, id):
-        """Résout une requête pour une destination spécifique"""
+    async def resolve_destination(self, info, id):
+        """Résout une requête pour une destination spécifique (chargement groupé par requête)"""
         print(f"GraphQL Query: destination(id: {id})")
-        destination = next((d for d in DESTINATIONS_DB if d['id'] == id), None)
+        destination = await info.context.loaders['destination'].load(id)
         if not destination:
             raise Exception(f"Destination avec ID {id} non trouvée")
         return destination
     
-    def resolve_destinations(self, info, country=None, max_price=None):
+    def resolve_destinations(self, info, country=None, min_price=None, max_price=None):
         """Résout une requête pour toutes les destinations avec filtres"""
-        print(f"GraphQL Query: destinations(country: {country}, max_price: {max_price})")
-        
-        results = DESTINATIONS_DB
-        
-        # Filtrer par pays si spécifié
-        if country:
-            results = [d for d in results if d['country'].lower() == country.lower()]
+        print(f"GraphQL Query: destinations(country: {country}, min_price: {min_price}, max_price: {max_price})")
         
-        # Filtrer par prix maximum si spécifié
-        if max_price:
-            results = [d for d in results if d['price_per_day'] <= max_price]
+        # Sans filtre : la liste complète, dans l'ordre d'origine
+        if not country and min_price is None and max_price is None:
+            return DESTINATIONS_DB
         
-        return results
+        # Index des prix du pays : seules les lignes correspondantes sont lues
+        return find_by_price(country, min_price, max_price)
 
 # Requetes GraphQL (Écritures)
 
@@ -167,6 +242,7 @@ class CreateDestination(graphene.Mutation):
         }
         
         DESTINATIONS_DB.append(new_destination)
+        index_destination(new_destination)
         next_id += 1
 
         # 🔔 Notifier les abonnés SSE
@@ -210,7 +286,8 @@ class UpdateDestination(graphene.Mutation):
                 message=f"Destination avec ID {id} non trouvée"
             )
         
-        # Mettre à jour les champs fournis
+        # Mettre à jour les champs fournis (réindexation prix / pays)
+        unindex_destination(destination)
         if name is not None:
             destination['name'] = name
         if country is not None:
@@ -219,6 +296,7 @@ class UpdateDestination(graphene.Mutation):
             destination['price_per_day'] = price_per_day
         if activities is not None:
             destination['activities'] = activities
+        index_destination(destination)
 
         # 🔔 Notifier les abonnés SSE
         notify_subscribers("destinationUpdated", {
@@ -262,6 +340,7 @@ class DeleteDestination(graphene.Mutation):
             "name": destination["name"],
         })
 
+        unindex_destination(destination)
         DESTINATIONS_DB = [d for d in DESTINATIONS_DB if d['id'] != id]
         
         return DeleteDestination(
@@ -284,6 +363,41 @@ schema = Schema(query=Query, mutation=Mutation)
 # Obtenir le schéma GraphQL interne (pas Graphene)
 graphql_schema = schema.graphql_schema
 
+# ── Limites de complexité des requêtes (0 : pas de limite) ──
+# Profondeur et alias : règles de validation, vérifiées une fois par document mis en cache
+# Coût : estimé à chaque requête (il dépend des variables), avant toute exécution
+GRAPHQL_MAX_DEPTH = int(os.environ.get('GRAPHQL_MAX_DEPTH', MAX_QUERY_DEPTH))
+GRAPHQL_MAX_ALIASES = int(os.environ.get('GRAPHQL_MAX_ALIASES', MAX_QUERY_ALIASES))
+GRAPHQL_MAX_COST = int(os.environ.get('GRAPHQL_MAX_COST', MAX_QUERY_COST))
+
+# Nombre maximal d'opérations par lot (POST /graphql avec un tableau JSON)
+GRAPHQL_MAX_BATCH = int(os.environ.get('GRAPHQL_MAX_BATCH', 20))
+
+complexity_rules = []
+if GRAPHQL_MAX_DEPTH:
+    complexity_rules.append(max_depth_rule(GRAPHQL_MAX_DEPTH))
+if GRAPHQL_MAX_ALIASES:
+    complexity_rules.append(max_aliases_rule(GRAPHQL_MAX_ALIASES))
+
+# Coût propre des champs racine ; la liste destinations est multipliée par le nombre de
+# destinations attendu, compté sur l'index des prix
+query_cost = QueryCostAnalyzer(
+    graphql_schema,
+    field_costs={"Query.destination": 1, "Query.destinations": 10},
+    list_sizes={"Query.destinations": lambda country=None, min_price=None, max_price=None:
+                count_by_price(country, min_price, max_price)},
+    max_cost=GRAPHQL_MAX_COST or float('inf')
+)
+
+# Documents analysés et validés, réutilisés tant que le texte de la requête est identique
+document_cache = DocumentCache(graphql_schema, rules=complexity_rules)
+
+# Requêtes persistées (APQ) : empreinte SHA-256 → document validé
+# GRAPHQL_PERSISTED_QUERIES=fichier.json active le mode liste blanche (seuls ces documents s'exécutent)
+persisted_queries = PersistedQueryStore(document_cache)
+if os.environ.get('GRAPHQL_PERSISTED_QUERIES'):
+    persisted_queries.load_allowlist(os.environ['GRAPHQL_PERSISTED_QUERIES'])
+
 
 # ROUTES FLASK
 
@@ -296,49 +410,143 @@ def home():
     })
 
 
+def prepare_operation(operation):
+    """
+    Document validé et coût estimé d'une opération {query, variables, operationName, extensions}
+    Retourne (document, coût, erreurs)
+    """
+    query = operation.get('query')
+    variables = operation.get('variables') or {}
+    persisted = (operation.get('extensions') or {}).get('persistedQuery')
+    
+    if not query and persisted is None:
+        return None, None, [GraphQLError("Requête GraphQL manquante")]
+    
+    print(f"\n{'='*70}")
+    print(f"GraphQL Request:")
+    print(f"{query or f'persistedQuery {persisted}'}")
+    if variables:
+        print(f"Variables: {variables}")
+    print(f"{'='*70}")
+    
+    # Document validé : requête persistée (APQ) ou cache de documents, sans nouvelle
+    # analyse ni validation pour un texte déjà vu
+    document, errors = persisted_queries.resolve(query, persisted)
+    if errors:
+        return None, None, errors
+    # Budget vérifié avant exécution : une requête trop coûteuse n'atteint pas les résolveurs
+    cost, error = query_cost.check(document, operation.get('operationName'), variables)
+    return document, cost, [error] if error else None
+
+
+def start_operation(operation, document, context):
+    """Lance l'exécution : ExecutionResult, ou awaitable si des chargeurs sont en attente"""
+    return execute(
+        graphql_schema,
+        document,
+        variable_values=operation.get('variables') or {},
+        operation_name=operation.get('operationName'),
+        context_value=context
+    )
+
+
+def operation_response(result, cost):
+    """Corps de réponse et code HTTP d'une opération exécutée"""
+    response_data = {
+        "data": result.data
+    }
+    
+    if result.errors:
+        response_data["errors"] = [
+            {"message": str(error), "extensions": error.extensions} if error.extensions
+            else {"message": str(error)}
+            for error in result.errors
+        ]
+    if cost is not None:
+        response_data["extensions"] = {"cost": {"requested": cost, "maximum": GRAPHQL_MAX_COST or None}}
+    
+    print(f"\nGraphQL Response:")
+    print(f"{response_data}")
+    print(f"{'='*70}\n")
+    
+    # PersistedQueryNotFound n'est pas une erreur du client : il renvoie le texte de la requête
+    if any(isinstance(error, PersistedQueryNotFound) for error in result.errors or ()):
+        return response_data, 200
+    return response_data, 200 if not result.errors else 400
+
+
+def execute_operation(operation):
+    """
+    Exécute une opération {query, variables, operationName, extensions}
+    Retourne (corps de réponse, code HTTP)
+    """
+    document, cost, errors = prepare_operation(operation)
+    if errors:
+        result = ExecutionResult(data=None, errors=errors)
+    else:
+        result = run_sync(start_operation(operation, document, RequestContext(BATCH_LOADERS)))
+    return operation_response(result, cost)
+
+
+def is_mutation(document, operation_name):
+    definition = get_operation_ast(document, operation_name)
+    return definition is not None and definition.operation == OperationType.MUTATION
+
+
+def execute_batch(operations):
+    """
+    Exécute un lot d'opérations et retourne la liste de leurs corps de réponse, dans l'ordre
+    - les lectures consécutives s'exécutent ensemble, sur une même boucle et avec les mêmes
+      chargeurs : leurs destination(id) sont chargées en un seul lot
+    - chaque mutation s'exécute seule, après les lectures qui la précèdent et avant celles
+      qui la suivent (qui repartent de chargeurs vides)
+    """
+    responses = [None] * len(operations)
+    reads = []
+
+    def flush_reads():
+        context = RequestContext(BATCH_LOADERS)
+        started = [start_operation(operation, document, context) for _, operation, document, _ in reads]
+        for (index, _, _, cost), result in zip(reads, run_all(started)):
+            responses[index] = operation_response(result, cost)[0]
+        reads.clear()
+
+    for index, operation in enumerate(operations):
+        if not isinstance(operation, dict):
+            responses[index] = {"data": None, "errors": [{"message": "Opération GraphQL invalide (objet JSON attendu)"}]}
+            continue
+        document, cost, errors = prepare_operation(operation)
+        if errors:
+            responses[index] = operation_response(ExecutionResult(data=None, errors=errors), cost)[0]
+        elif is_mutation(document, operation.get('operationName')):
+            flush_reads()
+            result = run_sync(start_operation(operation, document, RequestContext(BATCH_LOADERS)))
+            responses[index] = operation_response(result, cost)[0]
+        else:
+            reads.append((index, operation, document, cost))
+    flush_reads()
+    return responses
+
+
 @app.route('/graphql', methods=['POST'])
 def graphql_endpoint():
     """
     Endpoint GraphQL principal
-    Accepte des requêtes GraphQL en JSON
+    Accepte des requêtes GraphQL en JSON (texte de la requête ou empreinte persistée),
+    ou un tableau d'opérations (réponse : tableau des résultats, dans le même ordre)
     """
     try:
         data = request.get_json()
-        query = data.get('query')
-        variables = data.get('variables', {})
-        
-        if not query:
-            return jsonify({
-                "errors": [{"message": "Requête GraphQL manquante"}]
-            }), 400
-        
-        print(f"\n{'='*70}")
-        print(f"GraphQL Request:")
-        print(f"{query}")
-        if variables:
-            print(f"Variables: {variables}")
-        print(f"{'='*70}")
-        
-        result = graphql_sync(
-            graphql_schema,
-            query,
-            variable_values=variables
-        )
-        
-        response_data = {
-            "data": result.data
-        }
-        
-        if result.errors:
-            response_data["errors"] = [
-                {"message": str(error)} for error in result.errors
-            ]
-        
-        print(f"\nGraphQL Response:")
-        print(f"{response_data}")
-        print(f"{'='*70}\n")
-        
-        status_code = 200 if not result.errors else 400
+        if isinstance(data, list):
+            if not data or (GRAPHQL_MAX_BATCH and len(data) > GRAPHQL_MAX_BATCH):
+                return jsonify({
+                    "errors": [{
+                        "message": f"Lot de {len(data)} opérations : entre 1 et {GRAPHQL_MAX_BATCH or 'n'} attendues",
+                        "extensions": {"code": "INVALID_BATCH_SIZE", "maximum": GRAPHQL_MAX_BATCH or None}
+                    }]
+                }), 400
+            return jsonify(execute_batch(data)), 200
+        response_data, status_code = execute_operation(data)
         return jsonify(response_data), status_code
     
     except Exception as e:
@@ -350,6 +558,15 @@ def graphql_endpoint():
         }), 500
 
 
+@app.route('/graphql/stats', methods=['GET'])
+def graphql_stats():
+    """Compteurs du cache de documents (taux de hit)"""
+    return jsonify({
+        "document_cache": document_cache.stats(),
+        "persisted_queries": persisted_queries.stats()
+    })
+
+
 @app.route('/graphql/subscribe', methods=['GET'])
 def graphql_subscribe():
     """
@@ -363,15 +580,15 @@ def graphql_subscribe():
         print("🔔 Nouvel abonné SSE connecté")
         # Message de bienvenue
         welcome = {"type": "connected", "message": "Abonné aux événements GraphQL (simulation subscription)"}
-        yield f"data: {json.dumps(welcome)}\n\n"
+        yield f"data: {app.json.dumps(welcome)}\n\n"
         try:
             while True:
                 try:
                     event = q.get(timeout=30)
-                    yield f"data: {json.dumps(event)}\n\n"
+                    yield f"data: {app.json.dumps(event)}\n\n"
                 except queue.Empty:
                     # Heartbeat pour garder la connexion ouverte
-                    yield f"data: {json.dumps({'type': 'heartbeat'})}\n\n"
+                    yield f"data: {app.json.dumps({'type': 'heartbeat'})}\n\n"
         except GeneratorExit:
             with _subscribers_lock:
                 if q in _subscribers: